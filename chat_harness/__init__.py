@@ -0,0 +1,4 @@
+"""
+Chat API test harness
+Shared client, persona catalogue and runners for the /api/chat endpoints
+"""
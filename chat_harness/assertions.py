@@ -0,0 +1,109 @@
+"""
+Streaming turn assertions
+Declarative per-turn expectations evaluated incrementally while the reply
+streams in, so a turn can be cancelled the moment its outcome is certain.
+
+Expectation format (the "expect" block of a catalogue turn):
+{
+    "match": ["5,988", "per (year|yr)"],   # every regex must appear
+    "forbid": ["want (to see )?the price"], # no regex may appear
+    "maxLength": 1200                        # reply length cap in characters
+}
+
+All patterns are case-insensitive. The turn's expectStep is checked too,
+once the final 'done' event arrives.
+
+Verdicts are definitive as early as possible:
+- FAIL as soon as a forbidden pattern appears or maxLength is exceeded
+- PASS as soon as every match pattern has appeared, but only when nothing
+  later in the stream could still fail the turn (no forbid, maxLength or
+  expectStep); otherwise PASS waits for the end of the stream
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from chat_harness.personas import step_matches
+
+PASS = "pass"
+FAIL = "fail"
+PENDING = "pending"
+
+# How far back each incremental search re-reads, so a pattern split across
+# two chunks is still found without rescanning the whole reply
+SEARCH_OVERLAP = 200
+
+
+class TurnExpectation:
+    """Incremental evaluator for one turn's expectations"""
+
+    def __init__(self, expect: Optional[Dict[str, Any]] = None, expect_step: Any = None):
+        expect = expect or {}
+        self.pending = [re.compile(p, re.IGNORECASE) for p in expect.get("match", [])]
+        self.forbid = [re.compile(p, re.IGNORECASE) for p in expect.get("forbid", [])]
+        self.max_length = expect.get("maxLength")
+        self.expect_step = expect_step
+        self.scanned = 0
+        self.verdict = PENDING
+        self.reason = None
+
+    @property
+    def can_pass_early(self) -> bool:
+        return not self.forbid and self.max_length is None and self.expect_step is None
+
+    def _fail(self, reason: str) -> str:
+        self.verdict = FAIL
+        self.reason = reason
+        return self.verdict
+
+    def feed(self, text: str) -> str:
+        """Update with the reply so far; returns PASS, FAIL or PENDING"""
+        if self.verdict != PENDING:
+            return self.verdict
+
+        if self.max_length is not None and len(text) > self.max_length:
+            return self._fail(f"reply longer than {self.max_length} chars")
+
+        start = max(self.scanned - SEARCH_OVERLAP, 0)
+        window = text[start:]
+        self.scanned = len(text)
+
+        for pattern in self.forbid:
+            if pattern.search(window):
+                return self._fail(f"forbidden /{pattern.pattern}/ appeared")
+
+        self.pending = [p for p in self.pending if not p.search(window)]
+        if not self.pending and self.can_pass_early:
+            self.verdict = PASS
+        return self.verdict
+
+    def should_stop(self, text: str) -> bool:
+        """stream_message stop hook: True once the verdict is definitive"""
+        return self.feed(text) != PENDING
+
+    def finish(self, text: str, step: Optional[int]) -> str:
+        """Final verdict once the stream has ended (or was cancelled)"""
+        if self.verdict != PENDING:
+            return self.verdict
+        self.feed(text)
+        if self.verdict != PENDING:
+            return self.verdict
+
+        if self.pending:
+            missing = ", ".join(f"/{p.pattern}/" for p in self.pending)
+            return self._fail(f"never matched {missing}")
+        if not step_matches(self.expect_step, step):
+            return self._fail(f"expected step {self.expect_step}, got {step}")
+
+        self.verdict = PASS
+        return self.verdict
+
+
+def describe(expect: Optional[Dict[str, Any]]) -> List[str]:
+    """Human-readable list of a turn's expectations for reports"""
+    expect = expect or {}
+    lines = [f"mentions /{p}/" for p in expect.get("match", [])]
+    lines += [f"never says /{p}/" for p in expect.get("forbid", [])]
+    if expect.get("maxLength") is not None:
+        lines.append(f"at most {expect['maxLength']} chars")
+    return lines
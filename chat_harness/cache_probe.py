@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Prompt-Cache Effectiveness Probe
+Sends controlled request sequences to /api/chat/message and checks whether
+the server's prompt caching actually shows up as lower TTFT and cached
+prompt tokens:
+
+- identical:       same session, same message, repeated
+- shared_context:  same session and context, a different user message each time
+- cold_session:    same message, a brand-new session id each time
+
+The first request of each sequence is the cold reference; the rest are
+expected to be warm. Each sequence nudges calculatorData.billableRate by a
+random fraction of a dollar (eight decimal places, all rendered into the
+prompt) so neither an earlier run within the provider's cache TTL nor the
+previous sequence can pre-warm the cold reference.
+
+When the stream carries no usage block (the production server doesn't
+forward it), a warm request counts as a cache hit when its TTFT is below
+--warm-ratio of the cold TTFT.
+
+Usage:
+    python3 -m chat_harness.cache_probe
+    python3 -m chat_harness.cache_probe --requests 8 --min-ttft-gain 0.15 --min-hit-rate 0.8
+    python3 -m chat_harness.cache_probe --savings-url http://localhost:5000/api/admin/prompt-caching-savings \
+        --header "Cookie: connect.sid=..."
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from chat_harness.client import BASE_URL, build_message_payload, log, stream_message
+from chat_harness.depth import FILLER_MESSAGES
+from chat_harness.personas import load_persona
+from chat_harness.results import add_results_args, latency_stats, record_from_args
+from chat_harness.session import FALLBACK_WELCOME, new_session_id
+from chat_harness.stats import percentile
+
+SEQUENCES = ["identical", "shared_context", "cold_session"]
+
+# Salt resolution: billableRate is nudged by salt / SALT_SCALE dollars
+SALT_SCALE = 10 ** 8
+
+PROBE_MESSAGE = "how does the pricing work for someone at my volume?"
+
+
+def cached_tokens(usage: Optional[Dict[str, Any]]) -> Optional[int]:
+    """Cached prompt tokens from an OpenAI- or Anthropic-style usage block"""
+    if not usage:
+        return None
+    details = usage.get("prompt_tokens_details") or usage.get("input_tokens_details") or {}
+    for value in (details.get("cached_tokens"), usage.get("cached_tokens"),
+                  usage.get("cache_read_input_tokens")):
+        if value is not None:
+            return int(value)
+    return None
+
+
+def prompt_tokens(usage: Optional[Dict[str, Any]]) -> Optional[int]:
+    if not usage:
+        return None
+    value = usage.get("prompt_tokens", usage.get("input_tokens"))
+    return int(value) if value is not None else None
+
+
+def new_salt() -> int:
+    """Random salt in [0, SALT_SCALE); won't repeat between runs in practice"""
+    return uuid.uuid4().int % SALT_SCALE
+
+
+def run_sequence(kind: str, salt: int, persona: Dict[str, Any], count: int,
+                 base_url: str, gap: float) -> List[Dict[str, Any]]:
+    """Send one probe sequence and return a row per request
+
+    salt makes the context (and so the prompt prefix) unique to this sequence.
+    """
+    persona = copy.deepcopy(persona)
+    persona["calculatorData"]["billableRate"] = round(
+        persona["calculatorData"]["billableRate"] + salt / SALT_SCALE, 8)
+
+    http = requests.Session()
+    session_id = new_session_id(f"{persona['name']}-cache")
+    rows = []
+    for i in range(count):
+        if kind == "cold_session":
+            session_id = new_session_id(f"{persona['name']}-cache")
+        message = FILLER_MESSAGES[i % len(FILLER_MESSAGES)] if kind == "shared_context" else PROBE_MESSAGE
+        history = [
+            {"role": "assistant", "content": FALLBACK_WELCOME},
+            {"role": "user", "content": message},
+        ]
+        result = stream_message(build_message_payload(persona, session_id, message, history),
+                                base_url, session=http)
+        rows.append({
+            "sequence": kind,
+            "n": i,
+            "ttft": result["ttft"],
+            "prompt_tokens": prompt_tokens(result["usage"]),
+            "cached_tokens": cached_tokens(result["usage"]),
+            "error": result["error"] or (None if result["status"] == 200 else result["status"]),
+        })
+        if gap and i < count - 1:
+            time.sleep(gap)
+    return rows
+
+
+def sequence_report(rows: List[Dict[str, Any]], warm_ratio: float) -> Dict[str, Any]:
+    """Cold vs warm TTFT and cache hit rate for one sequence
+
+    The hit rate comes from cached-token usage when the stream reports it,
+    otherwise from TTFT: a warm request under warm_ratio x cold TTFT is a hit.
+    """
+    ok = [r for r in rows if not r["error"] and r["ttft"] is not None]
+    cold = ok[0]["ttft"] if ok and ok[0]["n"] == 0 else None
+    warm = [r for r in ok if r["n"] > 0]
+    warm_p50 = percentile([r["ttft"] for r in warm], 50)
+
+    with_usage = [r for r in warm if r["cached_tokens"] is not None]
+    cached_ratio = None
+    hit_rate = None
+    hit_source = None
+    if with_usage:
+        total_prompt = sum(r["prompt_tokens"] or 0 for r in with_usage)
+        cached_ratio = sum(r["cached_tokens"] for r in with_usage) / total_prompt if total_prompt else None
+        hit_rate = sum(1 for r in with_usage if r["cached_tokens"] > 0) / len(with_usage)
+        hit_source = "usage"
+    elif cold and warm:
+        hit_rate = sum(1 for r in warm if r["ttft"] < warm_ratio * cold) / len(warm)
+        hit_source = "ttft"
+
+    return {
+        "requests": len(rows),
+        "errors": len(rows) - len(ok),
+        "cold_ttft": cold,
+        "warm_ttft_p50": warm_p50,
+        "ttft_delta": (cold - warm_p50) if cold is not None and warm_p50 is not None else None,
+        "ttft_gain": (1 - warm_p50 / cold) if cold and warm_p50 is not None else None,
+        "hit_rate": hit_rate,
+        "hit_source": hit_source,
+        "cached_ratio": cached_ratio,
+    }
+
+
+def fetch_savings(url: str, headers: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Snapshot the server's prompt-caching counters (admin endpoint)"""
+    try:
+        response = requests.get(url, headers=headers, timeout=10)
+        if response.status_code != 200:
+            log(f"Savings endpoint returned {response.status_code}", "WARN")
+            return None
+        return response.json().get("promptCaching")
+    except Exception as e:
+        log(f"Savings endpoint error: {e}", "WARN")
+        return None
+
+
+def pct(value: Optional[float]) -> str:
+    return f"{value * 100:.0f}%" if value is not None else "n/a"
+
+
+def ms(value: Optional[float]) -> str:
+    return f"{value * 1000:.0f}ms" if value is not None else "n/a"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Probe prompt-cache effectiveness on the chat API')
+    parser.add_argument('--base-url', default=BASE_URL, help='Chat server base URL')
+    parser.add_argument('--persona', default='jessica', help='Persona whose context is sent')
+    parser.add_argument('--requests', type=int, default=5, help='Requests per sequence')
+    parser.add_argument('--gap', type=float, default=1.0, help='Seconds between requests')
+    parser.add_argument('--sequence', action='append', choices=SEQUENCES,
+                        help='Sequence to run (repeatable, default: all)')
+    parser.add_argument('--savings-url', help='Admin prompt-caching-savings URL for server-side counters')
+    parser.add_argument('--header', action='append', default=[],
+                        help='Extra header for --savings-url, e.g. "Cookie: ..."')
+    parser.add_argument('--min-ttft-gain', type=float, default=0.0,
+                        help='Fail if the identical sequence warms up by less than this fraction')
+    parser.add_argument('--min-hit-rate', type=float, default=0.0,
+                        help='Fail if any sequence reports a lower cache hit rate, or none reports one')
+    parser.add_argument('--warm-ratio', type=float, default=0.8,
+                        help='Without usage data, a warm request under this fraction of cold TTFT is a hit')
+    parser.add_argument('--json', help='Write rows and reports to this JSON file')
+    add_results_args(parser)
+    args = parser.parse_args()
+
+    persona = load_persona(args.persona)
+    headers = {k.strip(): v.strip() for k, v in (h.split(":", 1) for h in args.header)}
+    sequences = args.sequence or SEQUENCES
+
+    log("=" * 60)
+    log(f"PROMPT CACHE PROBE: {args.requests} requests x {len(sequences)} sequences")
+    log("=" * 60)
+
+    before = fetch_savings(args.savings_url, headers) if args.savings_url else None
+
+    rows = []
+    reports = {}
+    for kind in sequences:
+        seq_rows = run_sequence(kind, new_salt(), persona, args.requests, args.base_url, args.gap)
+        rows.extend(seq_rows)
+        reports[kind] = sequence_report(seq_rows, args.warm_ratio)
+        r = reports[kind]
+        log(f"{kind:<15} cold={ms(r['cold_ttft']):>7} warm p50={ms(r['warm_ttft_p50']):>7} "
+            f"delta={ms(r['ttft_delta']):>7} ({pct(r['ttft_gain'])}) "
+            f"hit rate={pct(r['hit_rate'])} ({r['hit_source'] or 'none'}) "
+            f"cached tokens={pct(r['cached_ratio'])}"
+            + (f" errors={r['errors']}" if r["errors"] else ""))
+
+    if not any(r["hit_source"] == "usage" for r in reports.values()):
+        log(f"No usage data in the stream - hit rate is warm TTFT < {args.warm_ratio:g} x cold", "WARN")
+
+    server = None
+    if before:
+        after = fetch_savings(args.savings_url, headers)
+        if after:
+            total = after["totalRequests"] - before["totalRequests"]
+            cached = after["cachedRequests"] - before["cachedRequests"]
+            server = {"requests": total, "cached": cached, "hit_rate": cached / total if total else None}
+            log(f"Server counters: {cached}/{total} requests cached ({pct(server['hit_rate'])})")
+
+    failures = []
+    identical = reports.get("identical")
+    if args.min_ttft_gain and identical and (identical["ttft_gain"] or 0) < args.min_ttft_gain:
+        failures.append(f"identical TTFT gain {pct(identical['ttft_gain'])} < {pct(args.min_ttft_gain)}")
+    if args.min_hit_rate:
+        for kind, r in reports.items():
+            if r["hit_rate"] is not None and r["hit_rate"] < args.min_hit_rate:
+                failures.append(f"{kind} hit rate {pct(r['hit_rate'])} < {pct(args.min_hit_rate)}")
+        if all(r["hit_rate"] is None for r in reports.values()):
+            failures.append("--min-hit-rate set but no sequence produced a hit rate")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"rows": rows, "reports": reports, "server": server}, f, indent=2)
+        log(f"Results written to {args.json}")
+
+    metrics = {"ttft": latency_stats([r["ttft"] for r in rows if not r["error"]])}
+    for kind, r in reports.items():
+        metrics[kind] = {k: r[k] for k in ("cold_ttft", "warm_ttft_p50", "ttft_gain", "hit_rate", "cached_ratio")}
+    sessions = sum(r["requests"] if kind == "cold_session" else 1 for kind, r in reports.items())
+    record_from_args(args, "cache_probe", metrics, sessions=sessions, requests=len(rows),
+                     errors=sum(r["errors"] for r in reports.values()), target=args.base_url,
+                     meta={"server": server} if server else None)
+
+    for failure in failures:
+        log(failure, "ERROR")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Traffic capture
+Compact append-only log of chat API requests for later replay.
+
+One JSON object per line, written with no whitespace:
+    {"ts": 1732060800123, "sid": "jessica-test-...", "ep": "welcome", "p": {...payload...}}
+
+ts is the wall-clock send time in milliseconds, so both the spacing between
+turns in a session and the overlap between sessions are preserved. ep is
+"welcome" or "message". Files ending in .gz are gzip-compressed with each
+record written as its own gzip member, so the file is complete after every
+write (no close or flush needed) and readers handle it transparently.
+
+Capture is switched on by setting KULL_CHAT_CAPTURE to a file path; every
+post_welcome()/stream_message() call in the process is then logged. Plain
+.jsonl files can be shared by several worker processes (each line is one
+O_APPEND write); use a per-process .gz path when compressing.
+"""
+
+import atexit
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+CAPTURE_ENV = "KULL_CHAT_CAPTURE"
+
+
+class CaptureWriter:
+    """Thread-safe appender for capture records"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.compress = path.endswith(".gz")
+        self.file = open(path, "ab", buffering=0)
+
+    def write(self, endpoint: str, payload: Dict[str, Any], ts: Optional[int] = None):
+        record = {
+            "ts": ts if ts is not None else int(time.time() * 1000),
+            "sid": payload.get("sessionId"),
+            "ep": endpoint,
+            "p": payload,
+        }
+        line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+        if self.compress:
+            line = gzip.compress(line)
+        with self.lock:
+            self.file.write(line)
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+_writer: Optional[CaptureWriter] = None
+_writer_lock = threading.Lock()
+
+
+def capture_request(endpoint: str, payload: Dict[str, Any]):
+    """Log a request if KULL_CHAT_CAPTURE is set (no-op otherwise)"""
+    global _writer
+    path = os.environ.get(CAPTURE_ENV)
+    if not path:
+        return
+    if _writer is None or _writer.path != path:
+        with _writer_lock:
+            if _writer is None or _writer.path != path:
+                _writer = CaptureWriter(path)
+    _writer.write(endpoint, payload)
+
+
+@atexit.register
+def _close_writer():
+    if _writer is not None:
+        _writer.close()
+
+
+def read_capture(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield capture records in file order (skips a torn final line)"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
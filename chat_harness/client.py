@@ -0,0 +1,203 @@
+"""
+Chat API client
+Builds persona payloads and talks to /api/chat/welcome and /api/chat/message
+
+Set KULL_CHAT_CAPTURE=<path> to log every request for later replay
+(see chat_harness/capture.py and chat_harness/replay.py).
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from chat_harness.capture import capture_request
+
+BASE_URL = "http://localhost:5000"
+
+WELCOME_TIMEOUT = 10
+MESSAGE_TIMEOUT = 15
+
+
+def log(msg: str, level: str = "INFO"):
+    """Simple logging"""
+    timestamp = time.strftime("%H:%M:%S")
+    print(f"[{timestamp}] [{level}] {msg}")
+
+
+def now_ms() -> int:
+    """Current wall-clock time in milliseconds (what the browser sends)"""
+    return int(time.time() * 1000)
+
+
+def build_welcome_payload(persona: Dict[str, Any], session_id: str,
+                          history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+    """Build the /api/chat/welcome request body for a persona"""
+    return {
+        "context": persona["context"],
+        "history": history or [],
+        "sessionId": session_id,
+        "calculatorData": persona["calculatorData"],
+        "sectionHistory": persona["sectionHistory"],
+        "currentTime": now_ms()
+    }
+
+
+def build_message_payload(persona: Dict[str, Any], session_id: str, message: str,
+                          history: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Build the /api/chat/message request body for a persona"""
+    # The welcome call sees every section (including unvisited ones), the
+    # message call only the sections the visitor actually opened
+    visited = [s for s in persona["sectionHistory"] if s.get("visited")]
+
+    return {
+        "message": message,
+        "history": history,
+        "sessionId": session_id,
+        "userActivity": persona["userActivity"],
+        "calculatorData": persona["calculatorData"],
+        "sectionHistory": visited,
+        "currentTime": now_ms(),
+        "timezone": persona.get("timezone", "America/Los_Angeles"),
+        "currentPath": persona["context"].get("currentPath", "/")
+    }
+
+
+def extract_content(chunk: Dict[str, Any]) -> str:
+    """Pull the text delta out of an SSE chunk, whichever shape the server used"""
+    if chunk.get('type') in ('content_delta', 'delta'):
+        return chunk.get('content') or ''
+
+    choices = chunk.get('choices')
+    if choices:
+        return choices[0].get('delta', {}).get('content') or ''
+
+    return ''
+
+
+def post_welcome(payload: Dict[str, Any], base_url: str = BASE_URL,
+                 timeout: float = WELCOME_TIMEOUT,
+                 session: Optional[requests.Session] = None) -> Dict[str, Any]:
+    """POST /api/chat/welcome and return a result dict
+
+    The result always carries status, latency and error keys; message,
+    skipped and reason are filled from the response body when present.
+    """
+    http = session or requests
+    result = {
+        "status": None,
+        "message": None,
+        "skipped": False,
+        "reason": None,
+        "latency": None,
+        "error": None,
+        "request_bytes": len(json.dumps(payload))
+    }
+
+    capture_request("welcome", payload)
+    start = time.perf_counter()
+    try:
+        response = http.post(f"{base_url}/api/chat/welcome", json=payload, timeout=timeout)
+        result["latency"] = time.perf_counter() - start
+        result["status"] = response.status_code
+
+        if response.status_code != 200:
+            result["error"] = response.text[:200]
+            return result
+
+        data = response.json()
+        result["skipped"] = bool(data.get("skipped"))
+        result["reason"] = data.get("reason")
+        if not result["skipped"]:
+            result["message"] = data.get("message")
+    except Exception as e:
+        result["latency"] = time.perf_counter() - start
+        result["error"] = str(e)
+
+    return result
+
+
+def stream_message(payload: Dict[str, Any], base_url: str = BASE_URL,
+                   timeout: float = MESSAGE_TIMEOUT, echo: bool = False,
+                   session: Optional[requests.Session] = None,
+                   stop_when: Optional[Callable[[str], bool]] = None) -> Dict[str, Any]:
+    """POST /api/chat/message and consume the SSE stream
+
+    Returns the assembled text together with timing: ttft is the time to the
+    first content delta, duration the time until the stream closed. step is
+    the currentStep reported by the final 'done' event, if any.
+
+    stop_when is called with the text so far after every content delta; when
+    it returns True the connection is closed and "cancelled" is set.
+    """
+    http = session or requests
+    result = {
+        "status": None,
+        "text": "",
+        "chunks": 0,
+        "ttft": None,
+        "duration": None,
+        "step": None,
+        "usage": None,
+        "error": None,
+        "cancelled": False,
+        "request_bytes": len(json.dumps(payload))
+    }
+
+    capture_request("message", payload)
+    start = time.perf_counter()
+    response = None
+    try:
+        response = http.post(f"{base_url}/api/chat/message", json=payload, timeout=timeout, stream=True)
+        result["status"] = response.status_code
+
+        if response.status_code != 200:
+            result["error"] = response.text[:200]
+            result["duration"] = time.perf_counter() - start
+            return result
+
+        for line in response.iter_lines():
+            if not line:
+                continue
+            line_str = line.decode('utf-8') if isinstance(line, bytes) else line
+            if not line_str.startswith('data: '):
+                continue
+
+            result["chunks"] += 1
+            try:
+                chunk = json.loads(line_str[6:])
+            except json.JSONDecodeError:
+                continue
+
+            content = extract_content(chunk)
+            if content:
+                if result["ttft"] is None:
+                    result["ttft"] = time.perf_counter() - start
+                result["text"] += content
+                if echo:
+                    print(content, end='', flush=True)
+                if stop_when and stop_when(result["text"]):
+                    result["cancelled"] = True
+                    break
+            elif chunk.get('type') == 'status':
+                if echo:
+                    log(f"Status: {chunk.get('message')}")
+            elif chunk.get('type') == 'error':
+                result["error"] = chunk.get('message')
+            elif chunk.get('type') == 'done':
+                result["step"] = chunk.get('currentStep')
+
+            if chunk.get('usage'):
+                result["usage"] = chunk['usage']
+
+        if echo:
+            print()  # Newline after streaming response
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        if response is not None and result["cancelled"]:
+            response.close()
+
+    result["duration"] = time.perf_counter() - start
+    return result
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Conversation-Depth Scaling Benchmark
+Drives a single chat session to a deep turn count and records, per turn,
+the request size (the full history is resent every time), TTFT and total
+stream time. Fits linear and quadratic growth curves and reports the turn
+depth where latency stops tracking the early linear trend.
+
+Usage:
+    python3 -m chat_harness.depth --turns 60
+    python3 -m chat_harness.depth --stub --stub-context-ms-per-kb 20 --json depth.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+import requests
+
+from chat_harness.client import (
+    BASE_URL, build_message_payload, build_welcome_payload, log,
+    post_welcome, stream_message
+)
+from chat_harness.personas import load_persona
+from chat_harness.results import add_results_args, latency_stats, record_from_args
+from chat_harness.session import FALLBACK_WELCOME, new_session_id
+from chat_harness.stats import find_knee, linear_fit, quadratic_fit
+
+# Used once a persona's scripted turns run out
+FILLER_MESSAGES = [
+    "ok that makes sense, tell me more",
+    "how would that work with my lightroom catalog?",
+    "what happens with my raw files after they're rated?",
+    "does it handle burst sequences well?",
+    "can I still override the ratings myself?",
+    "how long does a typical wedding take to process?",
+    "is there a limit on how many photos per month?",
+    "what if i'm not happy with it after the trial?",
+]
+
+METRICS = ["request_bytes", "ttft", "duration"]
+
+
+def turn_messages(persona: Dict[str, Any], count: int) -> List[str]:
+    """Scripted persona turns first, then filler questions, cycling as needed"""
+    scripted = [turn["message"] for turn in persona["turns"]]
+    messages = scripted[:count]
+    i = 0
+    while len(messages) < count:
+        messages.append(FILLER_MESSAGES[i % len(FILLER_MESSAGES)])
+        i += 1
+    return messages
+
+
+def run_depth(persona: Dict[str, Any], turns: int, base_url: str = BASE_URL,
+              timeout: float = 60) -> List[Dict[str, Any]]:
+    """Play one session to `turns` turns and return a row per turn"""
+    session_id = new_session_id(f"{persona['name']}-depth")
+    http = requests.Session()
+    conversation = []
+
+    welcome = post_welcome(build_welcome_payload(persona, session_id), base_url, session=http)
+    conversation.append({"role": "assistant", "content": welcome["message"] or FALLBACK_WELCOME})
+
+    rows = []
+    for depth, message in enumerate(turn_messages(persona, turns), start=1):
+        conversation.append({"role": "user", "content": message})
+        payload = build_message_payload(persona, session_id, message, conversation)
+        result = stream_message(payload, base_url, timeout=timeout, session=http)
+
+        rows.append({
+            "depth": depth,
+            "history_len": len(conversation),
+            "request_bytes": result["request_bytes"],
+            "ttft": result["ttft"],
+            "duration": result["duration"],
+            "error": result["error"],
+        })
+
+        ttft = f"{result['ttft'] * 1000:.0f}ms" if result["ttft"] is not None else "-"
+        log(f"turn {depth:>3}  history={len(conversation):>3}  "
+            f"bytes={result['request_bytes']:>7}  ttft={ttft:>7}  total={result['duration']:.2f}s"
+            + (f"  ERROR {result['error']}" if result["error"] else ""))
+
+        if result["text"]:
+            conversation.append({"role": "assistant", "content": result["text"]})
+
+    return rows
+
+
+def fit_growth(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fit each metric against turn depth"""
+    fits = {}
+    for metric in METRICS:
+        points = [(r["depth"], r[metric]) for r in rows if r[metric] is not None and not r["error"]]
+        if len(points) < 3:
+            fits[metric] = None
+            continue
+        xs = [p[0] for p in points]
+        ys = [float(p[1]) for p in points]
+        fits[metric] = {
+            "linear": linear_fit(xs, ys),
+            "quadratic": quadratic_fit(xs, ys),
+            "knee": find_knee(xs, ys),
+        }
+    return fits
+
+
+def print_fits(fits: Dict[str, Any]):
+    """Report the growth curves in human units"""
+    units = {"request_bytes": ("bytes", 1), "ttft": ("ms", 1000), "duration": ("ms", 1000)}
+    log("=" * 60)
+    log("GROWTH PER TURN")
+    log("=" * 60)
+    for metric, fit in fits.items():
+        if not fit:
+            log(f"{metric}: not enough data")
+            continue
+        unit, scale = units[metric]
+        lin = fit["linear"]
+        quad = fit["quadratic"]
+        log(f"{metric}: +{lin['slope'] * scale:.1f} {unit}/turn (linear r2={lin['r2']:.3f}, "
+            f"quadratic r2={quad['r2']:.3f}, c={quad['c'] * scale:.3f} {unit}/turn^2)")
+        if fit["knee"] is not None:
+            log(f"  stops scaling linearly at turn {fit['knee']:.0f}", "WARN")
+        else:
+            log(f"  linear across all turns")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark latency against conversation depth')
+    parser.add_argument('--base-url', default=BASE_URL, help='Chat server base URL')
+    parser.add_argument('--persona', default='jessica', help='Persona to drive the session')
+    parser.add_argument('--turns', type=int, default=60, help='Conversation depth to reach')
+    parser.add_argument('--timeout', type=float, default=60, help='Per-turn timeout in seconds')
+    parser.add_argument('--json', help='Write per-turn rows and fits to this JSON file')
+    parser.add_argument('--stub', action='store_true', help='Run against an in-process stand-in server')
+    parser.add_argument('--stub-context-ms-per-kb', type=float, default=5.0,
+                        help='Stand-in context-building cost per KB of request')
+    add_results_args(parser)
+    args = parser.parse_args()
+
+    persona = load_persona(args.persona)
+    base_url = args.base_url
+    server = None
+    if args.stub:
+        from chat_harness.stub_server import base_url_for, serve_in_background
+        server = serve_in_background(port=0, ttft_ms=50, tokens_per_sec=0,
+                                     context_ms_per_kb=args.stub_context_ms_per_kb)
+        base_url = base_url_for(server)
+
+    log("=" * 60)
+    log(f"DEPTH BENCHMARK: {persona['title']} to {args.turns} turns against {base_url}")
+    log("=" * 60)
+
+    start = time.perf_counter()
+    try:
+        rows = run_depth(persona, args.turns, base_url, args.timeout)
+    finally:
+        if server:
+            server.shutdown()
+    elapsed = time.perf_counter() - start
+
+    fits = fit_growth(rows)
+    print_fits(fits)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"persona": persona["name"], "rows": rows, "fits": fits}, f, indent=2)
+        log(f"Results written to {args.json}")
+
+    errors = sum(1 for r in rows if r["error"])
+    ok = [r for r in rows if not r["error"]]
+    record_from_args(args, "depth", {
+        "ttft": latency_stats([r["ttft"] for r in ok]),
+        "turn": latency_stats([r["duration"] for r in ok]),
+    }, sessions=1, requests=len(rows) + 1, errors=errors, elapsed=elapsed, target=base_url,
+        meta={"persona": persona["name"], "turns": args.turns, "stub": args.stub})
+
+    if errors:
+        log(f"{errors} turns failed", "ERROR")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
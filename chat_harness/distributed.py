@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Distributed Load Coordinator
+Spreads a chat load scenario over several worker processes or hosts so the
+load generator isn't capped by one Python process (GIL) or one NIC.
+
+The coordinator listens on TCP; workers connect, say hello, and receive a
+shard plus a wall-clock start time so every worker begins together. When a
+worker finishes it sends back its latency histograms and error counts, which
+the coordinator merges into one report. Messages are newline-delimited JSON.
+
+Scenarios:
+- openloop: the open-loop arrival rate is split evenly across workers
+- sessions: persona sessions (suite-style, repeated --repeat times) are dealt
+            round-robin to workers, each running --concurrency at a time
+
+Start times are wall-clock, so hosts should be NTP-synced; --start-delay
+must comfortably exceed any clock skew and the time to fan out shards.
+
+The protocol is unauthenticated: with --local the coordinator listens on a
+free loopback port only; --listen 0.0.0.0 is for trusted networks. A
+connection that doesn't say hello within --hello-timeout is dropped.
+
+Usage:
+    # everything on this machine, 4 worker processes
+    python3 -m chat_harness.distributed coordinator --local 4 --scenario openloop --rate 20 --duration 10m
+
+    # across hosts
+    python3 -m chat_harness.distributed coordinator --listen 0.0.0.0:7700 --workers 3 --scenario sessions --repeat 50
+    python3 -m chat_harness.distributed worker --connect coordinator-host:7700      # on each load host
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from chat_harness.client import BASE_URL, log
+from chat_harness.histogram import LatencyHistogram
+from chat_harness.openloop import OpenLoopRecorder, print_histograms, run_arrival, run_open_loop
+from chat_harness.personas import list_personas, load_persona
+from chat_harness.results import add_results_args, histogram_stats, record_from_args
+from chat_harness.soak import parse_duration, parse_mix
+
+DEFAULT_PORT = 7700
+DEFAULT_LISTEN = f"0.0.0.0:{DEFAULT_PORT}"
+LOCAL_LISTEN = "127.0.0.1:0"  # loopback, any free port
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    """'host:port' or 'host' (default port)"""
+    host, _, port = value.rpartition(":")
+    if not host:
+        return value, DEFAULT_PORT
+    return host, int(port)
+
+
+def send_msg(stream, message: Dict[str, Any]):
+    stream.write(json.dumps(message).encode("utf-8") + b"\n")
+    stream.flush()
+
+
+def recv_msg(stream) -> Optional[Dict[str, Any]]:
+    line = stream.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+# ----------------------------------------------------------------------------
+# Worker
+# ----------------------------------------------------------------------------
+
+def run_sessions_shard(persona_names: List[str], concurrency: int, base_url: str) -> OpenLoopRecorder:
+    """Closed-loop shard: play each listed persona session, `concurrency` at a time"""
+    recorder = OpenLoopRecorder()
+    personas = {name: load_persona(name) for name in set(persona_names)}
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        # Scheduled "now": closed loop has no arrival schedule to fall behind
+        futures = [pool.submit(lambda p=personas[name]: run_arrival(p, base_url, time.perf_counter(), recorder))
+                   for name in persona_names]
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                log(f"session crashed: {e!r}", "ERROR")
+                recorder.count_session(1, 1)
+    return recorder
+
+
+def run_shard(shard: Dict[str, Any]) -> OpenLoopRecorder:
+    """Execute one shard description sent by the coordinator"""
+    if shard["scenario"] == "openloop":
+        mix = shard["mix"]
+        personas = [load_persona(name) for name in mix]
+        return run_open_loop(personas, list(mix.values()), shard["rate"], shard["duration"],
+                             shard["arrival"], shard["max_inflight"], shard["base_url"], shard["seed"])
+    return run_sessions_shard(shard["personas"], shard["concurrency"], shard["base_url"])
+
+
+def worker(address: Tuple[str, int], connect_timeout: float = 60):
+    """Connect to the coordinator, run the shard it sends, report back"""
+    deadline = time.time() + connect_timeout
+    while True:
+        try:
+            sock = socket.create_connection(address, timeout=10)
+            break
+        except OSError:
+            if time.time() > deadline:
+                log(f"Could not reach coordinator at {address[0]}:{address[1]}", "ERROR")
+                sys.exit(1)
+            time.sleep(1)
+
+    sock.settimeout(None)
+    stream = sock.makefile("rwb")
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    send_msg(stream, {"type": "hello", "worker": name})
+
+    start = recv_msg(stream)
+    if not start or start.get("type") != "start":
+        log("Coordinator closed the connection before start", "ERROR")
+        sys.exit(1)
+
+    wait = start["start_at"] - time.time()
+    log(f"[{name}] shard received, starting in {max(wait, 0):.1f}s")
+    if wait > 0:
+        time.sleep(wait)
+    else:
+        log(f"[{name}] start time already passed by {-wait:.1f}s (clock skew?)", "WARN")
+
+    began = time.perf_counter()
+    try:
+        recorder = run_shard(start["shard"])
+        result = {
+            "type": "result",
+            "worker": name,
+            "sessions": recorder.sessions,
+            "requests": recorder.requests,
+            "errors": recorder.errors,
+            "elapsed": time.perf_counter() - began,
+            "histograms": {n: h.to_dict() for n, h in recorder.histograms.items()},
+        }
+    except Exception as e:
+        result = {"type": "result", "worker": name, "failed": str(e)}
+
+    send_msg(stream, result)
+    stream.close()
+    sock.close()
+
+
+# ----------------------------------------------------------------------------
+# Coordinator
+# ----------------------------------------------------------------------------
+
+def make_shards(args, count: int) -> List[Dict[str, Any]]:
+    """Split the scenario into `count` worker shards"""
+    if args.scenario == "openloop":
+        mix = parse_mix(args.mix)
+        return [{
+            "scenario": "openloop",
+            "base_url": args.base_url,
+            "mix": mix,
+            "rate": args.rate / count,
+            "duration": args.duration,
+            "arrival": args.arrival,
+            "max_inflight": args.max_inflight,
+            "seed": None if args.seed is None else args.seed + i,
+        } for i in range(count)]
+
+    names = (args.persona or list_personas()) * args.repeat
+    return [{
+        "scenario": "sessions",
+        "base_url": args.base_url,
+        "personas": names[i::count],
+        "concurrency": args.concurrency,
+    } for i in range(count)]
+
+
+def collect(conn_stream, name: str, results: List[Dict[str, Any]], lock: threading.Lock):
+    """Wait for one worker's result message"""
+    try:
+        result = recv_msg(conn_stream)
+    except (OSError, ValueError) as e:
+        result = None
+        log(f"{name}: {e}", "ERROR")
+    if result is None:
+        result = {"worker": name, "failed": "connection lost"}
+    with lock:
+        results.append(result)
+
+
+def coordinator(args):
+    host, port = parse_address(args.listen or (LOCAL_LISTEN if args.local else DEFAULT_LISTEN))
+    server = socket.create_server((host, port))
+    port = server.getsockname()[1]
+    expected = args.local or args.workers
+
+    children = []
+    if args.local:
+        for _ in range(args.local):
+            children.append(subprocess.Popen([
+                sys.executable, "-m", "chat_harness.distributed", "worker",
+                "--connect", f"127.0.0.1:{port}"
+            ]))
+
+    log("=" * 60)
+    log(f"COORDINATOR on {host}:{port}, waiting for {expected} workers")
+    log("=" * 60)
+
+    # One deadline for the whole join, so stray connections can't extend it
+    join_deadline = time.monotonic() + args.join_timeout
+    workers = []
+    try:
+        while len(workers) < expected:
+            remaining = join_deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout()
+            server.settimeout(remaining)
+            conn, addr = server.accept()
+            # Bounded read so a stray connection can't stall the join
+            conn.settimeout(min(args.hello_timeout, max(join_deadline - time.monotonic(), 0.1)))
+            stream = conn.makefile("rwb")
+            try:
+                hello = recv_msg(stream)
+            except (OSError, ValueError) as e:
+                log(f"  dropped connection from {addr[0]}: no hello ({e or 'timed out'})", "WARN")
+                hello = None
+            if not hello or hello.get("type") != "hello":
+                conn.close()
+                continue
+            conn.settimeout(None)
+            workers.append((conn, stream, hello["worker"]))
+            log(f"  worker {len(workers)}/{expected}: {hello['worker']} from {addr[0]}")
+    except socket.timeout:
+        if not workers:
+            log("No workers joined", "ERROR")
+            sys.exit(1)
+        log(f"Only {len(workers)}/{expected} workers joined - continuing", "WARN")
+
+    shards = make_shards(args, len(workers))
+    start_at = time.time() + args.start_delay
+    for (conn, stream, name), shard in zip(workers, shards):
+        send_msg(stream, {"type": "start", "start_at": start_at, "shard": shard})
+    log(f"Shards sent, synchronized start in {args.start_delay:.0f}s")
+
+    results = []
+    lock = threading.Lock()
+    threads = [threading.Thread(target=collect, args=(stream, name, results, lock))
+               for conn, stream, name in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for conn, stream, name in workers:
+        conn.close()
+    server.close()
+    for child in children:
+        child.wait()
+
+    merged = OpenLoopRecorder()
+    for result in sorted(results, key=lambda r: r["worker"]):
+        if result.get("failed"):
+            log(f"  {result['worker']}: FAILED ({result['failed']})", "ERROR")
+            continue
+        log(f"  {result['worker']}: {result['sessions']} sessions, {result['errors']} errors "
+            f"in {result['elapsed']:.0f}s")
+        merged.sessions += result["sessions"]
+        merged.requests += result["requests"]
+        merged.errors += result["errors"]
+        for hist_name, data in result["histograms"].items():
+            merged.histograms[hist_name].merge(LatencyHistogram.from_dict(data))
+
+    log("=" * 60)
+    log(f"MERGED REPORT ({len(workers)} workers, {args.scenario})")
+    log("=" * 60)
+    log(f"Sessions: {merged.sessions}, errors: {merged.errors}")
+    print_histograms(merged)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                "scenario": args.scenario,
+                "workers": [r["worker"] for r in results],
+                "sessions": merged.sessions,
+                "errors": merged.errors,
+                "failed_workers": [r["worker"] for r in results if r.get("failed")],
+                "summary": {n: h.summary() for n, h in merged.histograms.items()},
+                "histograms": {n: h.to_dict() for n, h in merged.histograms.items()},
+            }, f, indent=2)
+        log(f"Results written to {args.json}")
+
+    elapsed = max((r["elapsed"] for r in results if not r.get("failed")), default=None)
+    record_from_args(args, "distributed", {n: histogram_stats(h) for n, h in merged.histograms.items()},
+                     sessions=merged.sessions, requests=merged.requests, errors=merged.errors,
+                     elapsed=elapsed, target=args.base_url,
+                     meta={"scenario": args.scenario, "workers": len(workers)})
+
+    if any(r.get("failed") for r in results):
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Distributed chat load coordinator / worker')
+    sub = parser.add_subparsers(dest='role', required=True)
+
+    coord = sub.add_parser('coordinator', help='Distribute a scenario and merge results')
+    coord.add_argument('--listen', help=f'host:port to listen on (default {DEFAULT_LISTEN}, '
+                                        f'or {LOCAL_LISTEN} with --local)')
+    group = coord.add_mutually_exclusive_group(required=True)
+    group.add_argument('--workers', type=int, help='Number of remote workers to wait for')
+    group.add_argument('--local', type=int, help='Spawn this many local worker processes')
+    coord.add_argument('--join-timeout', type=float, default=120, help='Seconds to wait for all workers to join (one overall deadline)')
+    coord.add_argument('--hello-timeout', type=float, default=10,
+                       help='Seconds a new connection has to send its hello')
+    coord.add_argument('--start-delay', type=float, default=5, help='Seconds between shard fan-out and start')
+    coord.add_argument('--base-url', default=BASE_URL, help='Chat server base URL (as seen by workers)')
+    coord.add_argument('--scenario', choices=['openloop', 'sessions'], default='openloop')
+    coord.add_argument('--rate', type=float, default=1.0, help='openloop: total sessions per second')
+    coord.add_argument('--arrival', choices=['constant', 'poisson'], default='constant')
+    coord.add_argument('--duration', type=parse_duration, default=parse_duration("5m"))
+    coord.add_argument('--max-inflight', type=int, default=256, help='openloop: per-worker in-flight cap')
+    coord.add_argument('--mix', help='openloop: persona weights, e.g. jessica=3,chris=1')
+    coord.add_argument('--seed', type=int, help='openloop: base seed (worker i uses seed + i)')
+    coord.add_argument('--persona', action='append', help='sessions: persona name (repeatable)')
+    coord.add_argument('--repeat', type=int, default=1, help='sessions: times to run each persona')
+    coord.add_argument('--concurrency', type=int, default=8, help='sessions: per-worker concurrency')
+    coord.add_argument('--json', help='Write the merged report to this JSON file')
+    add_results_args(coord)
+
+    work = sub.add_parser('worker', help='Run shards for a coordinator')
+    work.add_argument('--connect', required=True, help='Coordinator host:port')
+    work.add_argument('--connect-timeout', type=float, default=60)
+
+    args = parser.parse_args()
+    if args.role == 'coordinator':
+        coordinator(args)
+    else:
+        worker(parse_address(args.connect), args.connect_timeout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Latency histogram
+HDR-style log-linear histogram: values are kept to ~1% relative precision in
+sparse buckets, so millions of samples cost a few KB and histograms from
+several runs (or worker processes) merge exactly by adding counts.
+"""
+
+import math
+from typing import Dict, Optional
+
+# Values below 2 ** PRECISION_BITS are exact; above that the top
+# PRECISION_BITS bits are kept (relative error < 2 ** -(PRECISION_BITS - 1))
+PRECISION_BITS = 8
+
+
+def bucket_of(value: int) -> int:
+    """Lowest value sharing a bucket with `value`"""
+    if value < (1 << PRECISION_BITS):
+        return value
+    shift = value.bit_length() - PRECISION_BITS
+    return (value >> shift) << shift
+
+
+def bucket_top(bucket: int) -> int:
+    """Highest value that lands in `bucket` (what percentiles report)"""
+    if bucket < (1 << PRECISION_BITS):
+        return bucket
+    shift = bucket.bit_length() - PRECISION_BITS
+    return bucket + (1 << shift) - 1
+
+
+class LatencyHistogram:
+    """Latency histogram in integer microseconds"""
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.max_value = 0
+
+    def record(self, seconds: float, count: int = 1):
+        """Record a latency given in seconds"""
+        value = max(int(seconds * 1_000_000), 0)
+        bucket = bucket_of(value)
+        self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += count
+        self.max_value = max(self.max_value, value)
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add another histogram's counts into this one"""
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += other.total
+        self.max_value = max(self.max_value, other.max_value)
+
+    def value_at(self, p: float) -> Optional[float]:
+        """Latency in seconds at percentile p (0-100)"""
+        if not self.total:
+            return None
+        target = max(math.ceil(self.total * p / 100), 1)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                return min(bucket_top(bucket), self.max_value) / 1_000_000
+        return self.max_value / 1_000_000
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """Count plus p50/p90/p99/p99.9/max in seconds"""
+        return {
+            "count": self.total,
+            "p50": self.value_at(50),
+            "p90": self.value_at(90),
+            "p99": self.value_at(99),
+            "p999": self.value_at(99.9),
+            "max": self.max_value / 1_000_000 if self.total else None
+        }
+
+    def to_dict(self) -> Dict[str, int]:
+        """JSON-safe form (bucket keys as strings)"""
+        return {str(bucket): count for bucket, count in self.counts.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, int]) -> "LatencyHistogram":
+        hist = cls()
+        for bucket, count in data.items():
+            bucket = int(bucket)
+            hist.counts[bucket] = hist.counts.get(bucket, 0) + count
+            hist.total += count
+            hist.max_value = max(hist.max_value, bucket_top(bucket))
+        return hist
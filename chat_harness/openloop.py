@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Open-Loop Arrival-Rate Driver
+Starts new persona sessions at a target arrival rate (constant or Poisson)
+no matter how many sessions are still in flight, the way real visitors
+arrive. A closed-loop driver like test_jessica_api.main() sends less when
+the server slows down and so hides exactly the latency it should measure.
+
+Latency for the first request of each session (welcome) and for the whole
+session is measured from the *scheduled* arrival time, not from when a
+worker got round to sending it, so client-side queueing is charged to the
+server the way a visitor would experience it (coordinated-omission safe).
+
+Usage:
+    python3 -m chat_harness.openloop --rate 2 --duration 10m
+    python3 -m chat_harness.openloop --rate 5 --arrival poisson --max-inflight 64 --json openloop.json
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from chat_harness.client import BASE_URL, log
+from chat_harness.histogram import LatencyHistogram
+from chat_harness.personas import load_persona
+from chat_harness.results import add_results_args, histogram_stats, record_from_args
+from chat_harness.session import run_session
+from chat_harness.soak import parse_duration, parse_mix
+
+HISTOGRAMS = ["welcome", "welcome_uncorrected", "ttft", "turn", "session", "queue_delay"]
+
+
+def arrival_times(rate: float, duration: float, arrival: str, rng: random.Random) -> List[float]:
+    """Scheduled session start offsets (seconds from run start)"""
+    times = []
+    t = 0.0
+    while True:
+        t += rng.expovariate(rate) if arrival == "poisson" else 1 / rate
+        if t >= duration:
+            return times
+        times.append(t)
+
+
+class OpenLoopRecorder:
+    """Thread-safe set of named latency histograms plus session, request and error counts
+
+    requests counts HTTP calls (welcome + message); errors counts the failed ones.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms: Dict[str, LatencyHistogram] = {name: LatencyHistogram() for name in HISTOGRAMS}
+        self.sessions = 0
+        self.requests = 0
+        self.errors = 0
+
+    def record(self, name: str, seconds):
+        if seconds is None:
+            return
+        with self.lock:
+            self.histograms[name].record(seconds)
+
+    def count_session(self, errors: int, requests: int):
+        with self.lock:
+            self.sessions += 1
+            self.requests += requests
+            self.errors += errors
+
+
+def run_arrival(persona: Dict, base_url: str, scheduled: float, recorder: OpenLoopRecorder):
+    """One visitor: runs its session and charges queueing to its latencies"""
+    started = time.perf_counter()
+    queue_delay = max(started - scheduled, 0.0)
+    recorder.record("queue_delay", queue_delay)
+
+    try:
+        # Read every stream to the end: latency must not depend on when an assertion fired
+        result = run_session(persona, base_url, early_cancel=False)
+    except Exception as e:
+        log(f"session crashed: {e}", "ERROR")
+        recorder.count_session(1, 1)
+        return
+
+    welcome_latency = result["welcome"]["latency"]
+    if welcome_latency is not None:
+        recorder.record("welcome_uncorrected", welcome_latency)
+        recorder.record("welcome", welcome_latency + queue_delay)
+    for turn in result["turns"]:
+        recorder.record("ttft", turn["ttft"])
+        recorder.record("turn", turn["duration"])
+    recorder.record("session", time.perf_counter() - scheduled)
+
+    errors = sum(1 for t in result["turns"] if t["error"] or t["status"] != 200)
+    errors += 1 if result["welcome"]["error"] else 0
+    recorder.count_session(errors, len(result["turns"]) + 1)
+
+
+def run_open_loop(personas: List[Dict], weights: List[float], rate: float, duration: float,
+                  arrival: str = "constant", max_inflight: int = 256, base_url: str = BASE_URL,
+                  seed=None) -> OpenLoopRecorder:
+    """Issue sessions on the arrival schedule and wait for all of them to finish"""
+    rng = random.Random(seed)
+    schedule = arrival_times(rate, duration, arrival, rng)
+    recorder = OpenLoopRecorder()
+
+    def check(future):
+        # run_arrival only guards run_session; anything else raised would be lost
+        error = future.exception()
+        if error is not None:
+            log(f"arrival crashed: {error!r}", "ERROR")
+            recorder.count_session(1, 1)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+        for offset in schedule:
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            persona = rng.choices(personas, weights=weights)[0]
+            pool.submit(run_arrival, persona, base_url, scheduled, recorder).add_done_callback(check)
+    return recorder
+
+
+def print_histograms(recorder: OpenLoopRecorder):
+    """Percentile table for every histogram"""
+    log(f"{'metric':<20} {'count':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'p99.9':>9} {'max':>9}")
+    for name in HISTOGRAMS:
+        s = recorder.histograms[name].summary()
+        if not s["count"]:
+            continue
+        cells = [f"{s[k] * 1000:8.0f}ms" for k in ("p50", "p90", "p99", "p999", "max")]
+        log(f"{name:<20} {s['count']:>7} {' '.join(cells)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Open-loop arrival-rate load test for the chat API')
+    parser.add_argument('--base-url', default=BASE_URL, help='Chat server base URL')
+    parser.add_argument('--rate', type=float, required=True, help='New sessions per second')
+    parser.add_argument('--arrival', choices=['constant', 'poisson'], default='constant')
+    parser.add_argument('--duration', type=parse_duration, default=parse_duration("5m"),
+                        help='How long to keep arrivals coming, e.g. 10m')
+    parser.add_argument('--max-inflight', type=int, default=256,
+                        help='Worker threads; arrivals beyond this queue and the wait is charged')
+    parser.add_argument('--mix', help='Persona weights, e.g. jessica=3,chris=1 (default: all equal)')
+    parser.add_argument('--seed', type=int, help='Seed for arrivals and persona selection')
+    parser.add_argument('--json', help='Write histogram summaries and buckets to this JSON file')
+    add_results_args(parser)
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    personas = [load_persona(name) for name in mix]
+    weights = list(mix.values())
+
+    log("=" * 60)
+    log(f"OPEN LOOP: {args.rate:g}/s {args.arrival} arrivals for {args.duration:.0f}s "
+        f"(~{int(args.rate * args.duration)} sessions, max {args.max_inflight} in flight)")
+    log("=" * 60)
+
+    start = time.perf_counter()
+    recorder = run_open_loop(personas, weights, args.rate, args.duration, args.arrival,
+                             args.max_inflight, args.base_url, args.seed)
+    elapsed = time.perf_counter() - start
+
+    log("=" * 60)
+    log("OPEN LOOP REPORT (latencies from scheduled arrival)")
+    log("=" * 60)
+    log(f"Sessions: {recorder.sessions} in {elapsed:.0f}s "
+        f"(offered {args.rate:g}/s, achieved {recorder.sessions / elapsed if elapsed else 0:.2f}/s), "
+        f"errors: {recorder.errors}")
+    print_histograms(recorder)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                "rate": args.rate,
+                "arrival": args.arrival,
+                "sessions": recorder.sessions,
+                "errors": recorder.errors,
+                "elapsed": elapsed,
+                "summary": {n: h.summary() for n, h in recorder.histograms.items()},
+                "histograms": {n: h.to_dict() for n, h in recorder.histograms.items()},
+            }, f, indent=2)
+        log(f"Results written to {args.json}")
+
+    record_from_args(args, "openloop", {n: histogram_stats(h) for n, h in recorder.histograms.items()},
+                     sessions=recorder.sessions, requests=recorder.requests, errors=recorder.errors,
+                     elapsed=elapsed, target=args.base_url, meta={"rate": args.rate, "arrival": args.arrival})
+
+
+if __name__ == '__main__':
+    main()
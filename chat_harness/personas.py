@@ -0,0 +1,102 @@
+"""
+Persona catalogue
+Loads persona definitions (profile, calculator data, browsing context and
+scripted turns) from chat_harness/personas/*.json
+
+Catalogue format:
+{
+    "name": "jessica",
+    "title": "Jessica - Price-Sensitive Newbie",
+    "profile": {...},                  # free-form persona facts for reports
+    "context": {...},                  # /api/chat/welcome context block
+    "calculatorData": {...},
+    "sectionHistory": [...],
+    "userActivity": [...],
+    "turns": [
+        {"label": "Price Inquiry", "message": "...", "expectStep": 14,
+         "expect": {"match": ["5,988"], "forbid": ["want the price"], "maxLength": 1200}},
+        {"label": "Goals", "message": "...", "expectStep": [2, 3]}
+    ]
+}
+
+expectStep is the currentStep the server should report in its final 'done'
+event after the turn: either an exact step or an inclusive [min, max] range.
+expect holds streaming assertions; see chat_harness/assertions.py.
+"""
+
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+CATALOGUE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "personas")
+
+REQUIRED_KEYS = ["name", "title", "profile", "context", "calculatorData",
+                 "sectionHistory", "userActivity", "turns"]
+
+
+class PersonaError(ValueError):
+    """Raised when a catalogue file is missing or malformed"""
+
+
+def validate_persona(persona: Dict[str, Any], source: str = "<persona>"):
+    """Check a persona definition has everything the runners rely on"""
+    missing = [key for key in REQUIRED_KEYS if key not in persona]
+    if missing:
+        raise PersonaError(f"{source}: missing keys {', '.join(missing)}")
+
+    for i, turn in enumerate(persona["turns"]):
+        if not turn.get("message"):
+            raise PersonaError(f"{source}: turn {i + 1} has no message")
+        expected = turn.get("expectStep")
+        if isinstance(expected, list) and len(expected) != 2:
+            raise PersonaError(f"{source}: turn {i + 1} expectStep range must be [min, max]")
+        expect = turn.get("expect") or {}
+        for pattern in expect.get("match", []) + expect.get("forbid", []):
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise PersonaError(f"{source}: turn {i + 1} bad pattern /{pattern}/ ({e})")
+
+
+def load_persona(name_or_path: str) -> Dict[str, Any]:
+    """Load one persona by catalogue name ("jessica") or by file path"""
+    path = name_or_path
+    if not os.path.exists(path):
+        path = os.path.join(CATALOGUE_DIR, f"{name_or_path}.json")
+
+    try:
+        with open(path, 'r') as f:
+            persona = json.load(f)
+    except FileNotFoundError:
+        raise PersonaError(f"Persona not found: {name_or_path}")
+    except json.JSONDecodeError as e:
+        raise PersonaError(f"{path}: invalid JSON ({e})")
+
+    validate_persona(persona, path)
+    return persona
+
+
+def list_personas() -> List[str]:
+    """Names of every persona in the catalogue directory"""
+    return sorted(
+        os.path.splitext(f)[0]
+        for f in os.listdir(CATALOGUE_DIR)
+        if f.endswith(".json")
+    )
+
+
+def load_catalogue(names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Load the named personas, or the whole catalogue when names is empty"""
+    return [load_persona(name) for name in (names or list_personas())]
+
+
+def step_matches(expected: Any, actual: Optional[int]) -> bool:
+    """Compare a turn's expectStep (int or [min, max]) against the reported step"""
+    if expected is None:
+        return True
+    if actual is None:
+        return False
+    if isinstance(expected, list):
+        return expected[0] <= actual <= expected[1]
+    return actual == expected
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Traffic Replay
+Replays a capture file (see chat_harness/capture.py) against a chat server,
+preserving the original spacing between turns and between sessions, sped
+up or slowed down by --speed.
+
+Each captured session is replayed in order on its own worker; a request is
+sent at its scheduled time (original offset / speed) or as soon as the
+previous request in the same session has finished, whichever is later.
+Session ids are rewritten to replay-<run>-<original> so the server never
+sees an already-active conversation, and currentTime is refreshed.
+Captured gaps include the original server's response time, so at high
+speeds requests queue behind the previous turn and show up as lag.
+
+Latencies are recorded in the same histograms as the open-loop driver:
+welcome/session include any lag behind schedule, queue_delay is that lag.
+With --speed max there is no schedule, so nothing is corrected.
+
+Usage:
+    python3 -m chat_harness.suite --capture traffic.jsonl       # record
+    python3 -m chat_harness.replay info traffic.jsonl
+    python3 -m chat_harness.replay run traffic.jsonl --speed 1
+    python3 -m chat_harness.replay run traffic.jsonl --speed 10 --json replay.json
+    python3 -m chat_harness.replay run traffic.jsonl --speed max --concurrency 32
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from chat_harness.client import BASE_URL, log, now_ms, post_welcome, stream_message
+from chat_harness.capture import read_capture
+from chat_harness.openloop import OpenLoopRecorder, print_histograms
+from chat_harness.results import add_results_args, histogram_stats, record_from_args
+from chat_harness.stats import percentile
+
+# Default cap on sessions replayed at once (same as openloop --max-inflight)
+DEFAULT_CONCURRENCY = 256
+
+
+def parse_speed(value: str) -> Optional[float]:
+    """'1', '2.5', '10x' or 'max' (None = no delays)"""
+    if value.lower() == "max":
+        return None
+    speed = float(value.lower().rstrip("x"))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def load_sessions(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Capture records grouped by session id, each list in send order"""
+    sessions: Dict[str, List[Dict[str, Any]]] = {}
+    for record in read_capture(path):
+        sessions.setdefault(record["sid"], []).append(record)
+    for records in sessions.values():
+        records.sort(key=lambda r: r["ts"])
+    return sessions
+
+
+def rewrite(payload: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+    """Copy of a captured payload with a fresh session id and timestamp"""
+    payload = dict(payload)
+    payload["sessionId"] = session_id
+    payload["currentTime"] = now_ms()
+    return payload
+
+
+def replay_session(records: List[Dict[str, Any]], session_id: str, base_url: str,
+                   start: float, t0: int, speed: Optional[float], recorder: OpenLoopRecorder):
+    """Replay one captured session in order"""
+    http = requests.Session()
+    errors = 0
+    first_scheduled = None
+    for record in records:
+        scheduled = None
+        if speed is not None:
+            scheduled = start + (record["ts"] - t0) / 1000 / speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        if first_scheduled is None:
+            first_scheduled = scheduled if scheduled is not None else time.perf_counter()
+        lag = max(time.perf_counter() - scheduled, 0.0) if scheduled is not None else 0.0
+        recorder.record("queue_delay", lag)
+
+        payload = rewrite(record["p"], session_id)
+        if record["ep"] == "welcome":
+            result = post_welcome(payload, base_url, session=http)
+            if result["latency"] is not None:
+                recorder.record("welcome_uncorrected", result["latency"])
+                recorder.record("welcome", result["latency"] + lag)
+        else:
+            result = stream_message(payload, base_url, session=http)
+            recorder.record("ttft", result["ttft"])
+            recorder.record("turn", result["duration"])
+        if result["error"] or result["status"] != 200:
+            errors += 1
+
+    recorder.record("session", time.perf_counter() - first_scheduled)
+    recorder.count_session(errors, len(records))
+    http.close()
+
+
+def run_replay(sessions: Dict[str, List[Dict[str, Any]]], speed: Optional[float],
+               concurrency: Optional[int] = None, base_url: str = BASE_URL) -> OpenLoopRecorder:
+    """Replay every session and wait for all of them to finish
+
+    A session that crashes (e.g. a malformed record) counts as one error.
+    """
+    recorder = OpenLoopRecorder()
+    run = int(time.time())
+    t0 = min(records[0]["ts"] for records in sessions.values())
+    ordered = sorted(sessions.items(), key=lambda item: item[1][0]["ts"])
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(concurrency or DEFAULT_CONCURRENCY, len(ordered))) as pool:
+        futures = {pool.submit(replay_session, records, f"replay-{run}-{original}", base_url,
+                               start, t0, speed, recorder): original
+                   for original, records in ordered}
+        for future, original in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                log(f"session {original} crashed: {e!r}", "ERROR")
+                recorder.count_session(1, 1)
+    return recorder
+
+
+def print_info(path: str, sessions: Dict[str, List[Dict[str, Any]]]):
+    """Summary of what a capture file contains"""
+    records = [r for rs in sessions.values() for r in rs]
+    if not records:
+        log(f"{path}: no records", "WARN")
+        return
+    span = (max(r["ts"] for r in records) - min(r["ts"] for r in records)) / 1000
+    gaps = sorted((b["ts"] - a["ts"]) / 1000 for rs in sessions.values() for a, b in zip(rs, rs[1:]))
+    sizes = sorted(len(json.dumps(r["p"], separators=(",", ":"))) for r in records)
+    welcomes = sum(1 for r in records if r["ep"] == "welcome")
+
+    log(f"Capture: {path}")
+    log(f"  Sessions: {len(sessions)}")
+    log(f"  Requests: {len(records)} ({welcomes} welcome, {len(records) - welcomes} message)")
+    log(f"  Span: {span:.1f}s (replays in {span / 10:.1f}s at 10x)")
+    if gaps:
+        log(f"  Gap between turns: p50={percentile(gaps, 50):.2f}s p95={percentile(gaps, 95):.2f}s "
+            f"max={gaps[-1]:.2f}s")
+    log(f"  Payload size: p50={percentile(sizes, 50):.0f}B p95={percentile(sizes, 95):.0f}B "
+        f"max={sizes[-1]}B")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay captured chat traffic')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    info = sub.add_parser('info', help='Summarize a capture file')
+    info.add_argument('capture', help='Capture file (.jsonl or .jsonl.gz)')
+
+    run = sub.add_parser('run', help='Replay a capture file against a server')
+    run.add_argument('capture', help='Capture file (.jsonl or .jsonl.gz)')
+    run.add_argument('--base-url', default=BASE_URL, help='Chat server base URL')
+    run.add_argument('--speed', type=parse_speed, default=1.0,
+                     help="Time scale: 1 = real time, 10 = ten times faster, 'max' = no delays")
+    run.add_argument('--concurrency', type=int,
+                     help=f'Max sessions in flight (default {DEFAULT_CONCURRENCY}); '
+                          'later sessions wait for a worker and show up as lag')
+    run.add_argument('--json', help='Write histogram summaries and buckets to this JSON file')
+    add_results_args(run)
+    args = parser.parse_args()
+
+    sessions = load_sessions(args.capture)
+    if args.command == 'info':
+        print_info(args.capture, sessions)
+        return
+    if not sessions:
+        log(f"{args.capture}: no records to replay", "ERROR")
+        sys.exit(1)
+
+    speed_label = "max speed" if args.speed is None else f"{args.speed:g}x"
+    log("=" * 60)
+    log(f"REPLAY: {len(sessions)} sessions from {args.capture} at {speed_label}")
+    log("=" * 60)
+
+    start = time.perf_counter()
+    recorder = run_replay(sessions, args.speed, args.concurrency, args.base_url)
+    elapsed = time.perf_counter() - start
+
+    log("=" * 60)
+    log("REPLAY REPORT" + ("" if args.speed is None else " (latencies include lag behind schedule)"))
+    log("=" * 60)
+    log(f"Sessions: {recorder.sessions} in {elapsed:.1f}s, errors: {recorder.errors}")
+    print_histograms(recorder)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                "capture": args.capture,
+                "speed": args.speed,
+                "sessions": recorder.sessions,
+                "errors": recorder.errors,
+                "elapsed": elapsed,
+                "summary": {n: h.summary() for n, h in recorder.histograms.items()},
+                "histograms": {n: h.to_dict() for n, h in recorder.histograms.items()},
+            }, f, indent=2)
+        log(f"Results written to {args.json}")
+
+    record_from_args(args, "replay", {n: histogram_stats(h) for n, h in recorder.histograms.items()},
+                     sessions=recorder.sessions, requests=recorder.requests, errors=recorder.errors,
+                     elapsed=elapsed, target=args.base_url, meta={"capture": args.capture, "speed": args.speed})
+
+    if recorder.errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Results Store
+Local SQLite database of harness and release runs, so latency and release
+time can be tracked across commits instead of living only in console logs
+and hand-written reports.
+
+Every harness mode records one row per run (kind, git commit, elapsed,
+sessions, requests, errors, throughput) plus its latency percentiles as
+metrics (name.stat, e.g. ttft.p95 in seconds). The counts mean the same in
+every mode: sessions are conversations started, requests are HTTP calls to
+the chat API (welcome and message alike), errors are the requests that
+failed, and throughput is requests per second. Release runs are recorded from
+scripts/release.sh with their total time and TestFlight step timings.
+Pass --no-record to any mode to skip it.
+
+The database is KULL_RESULTS_DB if set, otherwise harness-results.sqlite in
+the repo root.
+
+Usage:
+    python3 -m chat_harness.results runs --kind suite
+    python3 -m chat_harness.results trend --kind openloop --metric ttft.p95
+    python3 -m chat_harness.results compare --kind suite --baseline a1b2c3d --threshold 0.10
+    python3 -m chat_harness.results compare --kind release --baseline previous
+    python3 -m chat_harness.results record --kind release --label 2025.11.18.1642 \\
+        --metric total=1830 --timings testflight=/tmp/testflight-timings.json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from chat_harness.client import log
+from chat_harness.stats import summarize
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB = os.environ.get("KULL_RESULTS_DB") or os.path.join(REPO_ROOT, "harness-results.sqlite")
+
+# What `compare` gates on when no --check is given
+DEFAULT_CHECKS = {"release": ["total.value"]}
+DEFAULT_CHECK = ["ttft.p95"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    git_commit TEXT,
+    git_dirty INTEGER,
+    label TEXT,
+    target TEXT,
+    elapsed REAL,
+    sessions INTEGER,
+    requests INTEGER,
+    errors INTEGER,
+    throughput REAL,
+    meta TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    stat TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run_id, name, stat)
+);
+CREATE INDEX IF NOT EXISTS runs_by_kind ON runs(kind, id);
+"""
+
+
+def connect(path: str = DEFAULT_DB) -> sqlite3.Connection:
+    """Open (creating if needed) the results database"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    # Databases created before sessions were stored separately
+    if "sessions" not in {row["name"] for row in conn.execute("PRAGMA table_info(runs)")}:
+        conn.execute("ALTER TABLE runs ADD COLUMN sessions INTEGER")
+    return conn
+
+
+def git_commit() -> Tuple[Optional[str], Optional[bool]]:
+    """HEAD commit of the repo and whether the tree has local changes"""
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                             text=True, timeout=10, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, timeout=30, check=True).stdout
+        return sha, bool(status.strip())
+    except (OSError, subprocess.SubprocessError):
+        return None, None
+
+
+def latency_stats(values: Sequence[Optional[float]]) -> Dict[str, Optional[float]]:
+    """Percentile metrics for a list of latencies (seconds)"""
+    s = summarize(values)
+    return {k: s[k] for k in ("count", "mean", "p50", "p95", "p99", "max")}
+
+
+def histogram_stats(histogram) -> Dict[str, Optional[float]]:
+    """Percentile metrics for a LatencyHistogram"""
+    return {
+        "count": histogram.total,
+        "p50": histogram.value_at(50),
+        "p95": histogram.value_at(95),
+        "p99": histogram.value_at(99),
+        "max": histogram.max_value / 1_000_000 if histogram.total else None,
+    }
+
+
+def record_run(kind: str, metrics: Dict[str, Dict[str, Optional[float]]], sessions: Optional[int] = None,
+               requests: Optional[int] = None, errors: Optional[int] = None, elapsed: Optional[float] = None, target: Optional[str] = None,
+               label: Optional[str] = None, meta: Optional[Dict[str, Any]] = None,
+               db_path: str = DEFAULT_DB) -> int:
+    """Store one run and its metrics; returns the run id
+
+    requests counts HTTP calls (welcome and message), so throughput is
+    comparable across modes; sessions counts conversations.
+    """
+    sha, dirty = git_commit()
+    throughput = requests / elapsed if requests is not None and elapsed else None
+    conn = connect(db_path)
+    with conn:
+        cursor = conn.execute(
+            "INSERT INTO runs (kind, started_at, git_commit, git_dirty, label, target, elapsed, "
+            "sessions, requests, errors, throughput, meta) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() - (elapsed or 0))),
+             sha, None if dirty is None else int(dirty), label, target, elapsed, sessions, requests,
+             errors, throughput, json.dumps(meta) if meta else None))
+        run_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO metrics (run_id, name, stat, value) VALUES (?, ?, ?, ?)",
+            [(run_id, name, stat, float(value))
+             for name, stats in metrics.items() for stat, value in stats.items() if value is not None])
+    conn.close()
+    return run_id
+
+
+def add_results_args(parser: argparse.ArgumentParser):
+    """--results-db / --no-record / --label for a harness mode"""
+    parser.add_argument('--results-db', default=DEFAULT_DB, help='SQLite results database')
+    parser.add_argument('--no-record', action='store_true', help="Don't record this run in the results database")
+    parser.add_argument('--label', help='Free-form label stored with the run')
+
+
+def record_from_args(args, kind: str, metrics: Dict[str, Dict[str, Optional[float]]], **fields):
+    """Record a harness run unless --no-record; never fails the run itself"""
+    if args.no_record:
+        return None
+    try:
+        run_id = record_run(kind, metrics, label=args.label, db_path=args.results_db, **fields)
+    except sqlite3.Error as e:
+        log(f"Could not record results in {args.results_db}: {e}", "WARN")
+        return None
+    log(f"Recorded as {kind} run #{run_id} in {args.results_db}")
+    return run_id
+
+
+# ----------------------------------------------------------------------------
+# Queries
+# ----------------------------------------------------------------------------
+
+def parse_check(check: str) -> Tuple[str, str]:
+    """'ttft.p95' -> ('ttft', 'p95'); a bare name means its 'value' stat"""
+    name, _, stat = check.rpartition(".")
+    return (name, stat) if name else (check, "value")
+
+
+def find_run(conn: sqlite3.Connection, ref: str, kind: Optional[str]) -> Optional[sqlite3.Row]:
+    """Resolve 'latest', 'previous', a run id, a commit prefix or a label"""
+    where, params = ("kind = ?", [kind]) if kind else ("1 = 1", [])
+    if ref in ("latest", "previous"):
+        rows = conn.execute(f"SELECT * FROM runs WHERE {where} ORDER BY id DESC LIMIT 2", params).fetchall()
+        index = 0 if ref == "latest" else 1
+        return rows[index] if len(rows) > index else None
+    if ref.isdigit():
+        row = conn.execute(f"SELECT * FROM runs WHERE {where} AND id = ?", params + [int(ref)]).fetchone()
+        if row:
+            return row
+    # Latest run at that commit (or with that label)
+    return conn.execute(
+        f"SELECT * FROM runs WHERE {where} AND (git_commit LIKE ? OR label = ?) ORDER BY id DESC LIMIT 1",
+        params + [ref + "%", ref]).fetchone()
+
+
+def run_metric(conn: sqlite3.Connection, run_id: int, name: str, stat: str) -> Optional[float]:
+    row = conn.execute("SELECT value FROM metrics WHERE run_id = ? AND name = ? AND stat = ?",
+                       (run_id, name, stat)).fetchone()
+    return row["value"] if row else None
+
+
+def trend(conn: sqlite3.Connection, kind: str, name: str, stat: str, limit: int = 20) -> List[sqlite3.Row]:
+    """Oldest-first series of one metric over the latest `limit` runs of a kind"""
+    rows = conn.execute(
+        "SELECT r.id, r.started_at, r.git_commit, r.git_dirty, r.label, r.requests, r.errors, "
+        "r.throughput, m.value FROM runs r JOIN metrics m ON m.run_id = r.id "
+        "WHERE r.kind = ? AND m.name = ? AND m.stat = ? ORDER BY r.id DESC LIMIT ?",
+        (kind, name, stat, limit)).fetchall()
+    return list(reversed(rows))
+
+
+def compare_runs(conn: sqlite3.Connection, baseline: sqlite3.Row, candidate: sqlite3.Row,
+                 checks: List[str], threshold: float) -> List[Dict[str, Any]]:
+    """Relative change of each checked metric; regressed when it grew by more than threshold"""
+    results = []
+    for check in checks:
+        name, stat = parse_check(check)
+        base = run_metric(conn, baseline["id"], name, stat)
+        cand = run_metric(conn, candidate["id"], name, stat)
+        change = (cand - base) / base if base and cand is not None else None
+        results.append({
+            "check": f"{name}.{stat}",
+            "baseline": base,
+            "candidate": cand,
+            "change": change,
+            "regressed": change is not None and change > threshold,
+            "missing": base is None or cand is None,
+        })
+    return results
+
+
+def error_rate(run: sqlite3.Row) -> Optional[float]:
+    """Errors per request, or the raw error count when requests aren't known (release runs)"""
+    if run["errors"] is None:
+        return None
+    return run["errors"] / run["requests"] if run["requests"] else float(run["errors"])
+
+
+def compare_errors(baseline: sqlite3.Row, candidate: sqlite3.Row, tolerance: float) -> Dict[str, Any]:
+    """Regressed when the candidate's error rate exceeds the baseline's by more than tolerance"""
+    base = error_rate(baseline)
+    cand = error_rate(candidate)
+    return {
+        "check": "errors.rate",
+        "baseline": base,
+        "candidate": cand,
+        "change": cand - (base or 0.0) if cand is not None else None,
+        "regressed": cand is not None and cand - (base or 0.0) > tolerance,
+        "missing": cand is None,
+    }
+
+
+# ----------------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------------
+
+def describe_run(row: sqlite3.Row) -> str:
+    commit = (row["git_commit"] or "unknown")[:10] + ("+dirty" if row["git_dirty"] else "")
+    return f"#{row['id']} {row['kind']} {row['started_at']} {commit}" + (f" [{row['label']}]" if row["label"] else "")
+
+
+def fmt(stat: str, value: Optional[float]) -> str:
+    """Latency stats in ms, everything else as-is"""
+    if value is None:
+        return "-"
+    if stat.startswith("p") or stat in ("max", "mean"):
+        return f"{value * 1000:.0f}ms"
+    return f"{value:g}"
+
+
+def cmd_runs(conn: sqlite3.Connection, args):
+    where, params = ("WHERE kind = ?", [args.kind]) if args.kind else ("", [])
+    rows = conn.execute(f"SELECT * FROM runs {where} ORDER BY id DESC LIMIT ?", params + [args.limit]).fetchall()
+    for row in reversed(rows):
+        p95 = run_metric(conn, row["id"], "ttft", "p95")
+        total = run_metric(conn, row["id"], "total", "value")
+        extra = f"ttft p95={fmt('p95', p95)}" if p95 is not None else (
+            f"total={total:.0f}s" if total is not None else "")
+        log(f"{describe_run(row)}  sessions={row['sessions'] if row['sessions'] is not None else '-'} "
+            f"req={row['requests'] if row['requests'] is not None else '-'} "
+            f"err={row['errors'] if row['errors'] is not None else '-'} {extra}")
+
+
+def cmd_trend(conn: sqlite3.Connection, args):
+    name, stat = parse_check(args.metric)
+    rows = trend(conn, args.kind, name, stat, args.limit)
+    if not rows:
+        log(f"No {args.kind} runs with {name}.{stat}", "WARN")
+        return
+    first = rows[0]["value"]
+    log(f"{args.kind} {name}.{stat} over the last {len(rows)} runs:")
+    for row in rows:
+        change = f"{(row['value'] - first) / first:+.1%}" if first else ""
+        commit = (row["git_commit"] or "unknown")[:10] + ("+dirty" if row["git_dirty"] else "")
+        log(f"  #{row['id']:<5} {row['started_at']} {commit:<16} {fmt(stat, row['value']):>9} {change:>8}"
+            + (f"  [{row['label']}]" if row["label"] else ""))
+
+
+def cmd_compare(conn: sqlite3.Connection, args):
+    baseline = find_run(conn, args.baseline, args.kind)
+    candidate = find_run(conn, args.candidate, args.kind)
+    if baseline is None or candidate is None:
+        log(f"Run not found: {args.baseline if baseline is None else args.candidate}", "ERROR")
+        sys.exit(2)
+
+    checks = args.check or DEFAULT_CHECKS.get(args.kind, DEFAULT_CHECK)
+    log(f"Baseline:  {describe_run(baseline)}")
+    log(f"Candidate: {describe_run(candidate)}")
+    results = compare_runs(conn, baseline, candidate, checks, args.threshold)
+    results.append(compare_errors(baseline, candidate, args.error_tolerance))
+
+    for r in results:
+        stat = r["check"].rpartition(".")[2]
+        if r["check"] == "errors.rate":
+            change = f"{r['change']:+g}" if r["change"] is not None else "n/a"
+        else:
+            change = f"{r['change']:+.1%}" if r["change"] is not None else "n/a"
+        status = "MISSING" if r["missing"] else "REGRESSED" if r["regressed"] else "ok"
+        log(f"  {r['check']:<24} {fmt(stat, r['baseline']):>9} -> {fmt(stat, r['candidate']):>9} "
+            f"{change:>8}  {status}", "ERROR" if r["regressed"] or r["candidate"] is None else "INFO")
+
+    if any(r["regressed"] for r in results):
+        log(f"Regression against {describe_run(baseline)} (threshold {args.threshold:.0%}, "
+            f"error tolerance {args.error_tolerance:g})", "ERROR")
+        sys.exit(1)
+    # A candidate without a gated metric (e.g. every request failed, so no
+    # latencies) must not pass; a baseline without it only can't be compared
+    if any(r["candidate"] is None for r in results):
+        log("Candidate run is missing gated metrics", "ERROR")
+        sys.exit(1)
+    if any(r["missing"] for r in results):
+        log("Some checks could not be compared (metric missing from the baseline)", "WARN")
+
+
+def cmd_record(conn: sqlite3.Connection, args):
+    """Record a run from the command line (used by scripts/release.sh)"""
+    metrics: Dict[str, Dict[str, float]] = {}
+    for item in args.metric:
+        key, _, value = item.partition("=")
+        name, stat = parse_check(key)
+        metrics.setdefault(name, {})[stat] = float(value)
+
+    # Step timings written by scripts/release_deadline.py (--timings-json),
+    # stored as <prefix>:total and <prefix>:<step name> in seconds
+    meta = {}
+    for item in args.timings:
+        prefix, _, path = item.partition("=")
+        try:
+            with open(path, 'r') as f:
+                timings = json.load(f)
+        except (OSError, ValueError) as e:
+            log(f"Skipping timings {path}: {e}", "WARN")
+            continue
+        metrics.setdefault(f"{prefix}:total", {})["value"] = timings["elapsed"]
+        for step in timings["steps"]:
+            stats = metrics.setdefault(f"{prefix}:{step['name']}", {})
+            stats["value"] = stats.get("value", 0) + (step["seconds"] or 0)
+        for key in ("expired_in", "timed_out_in"):
+            if timings.get(key):
+                meta[f"{prefix}_{key}"] = timings[key]
+
+    elapsed = metrics.get("total", {}).get("value")
+    conn.close()
+    run_id = record_run(args.kind, metrics, errors=args.errors, elapsed=elapsed, target=args.target,
+                        label=args.label, meta=meta or None, db_path=args.results_db)
+    log(f"Recorded as {args.kind} run #{run_id} in {args.results_db}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query and compare recorded harness and release runs')
+    parser.add_argument('--results-db', default=DEFAULT_DB, help='SQLite results database')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    runs = sub.add_parser('runs', help='List recent runs')
+    runs.add_argument('--kind', help='suite, jessica, openloop, soak, depth, replay, sweep, cache_probe, distributed, release')
+    runs.add_argument('--limit', type=int, default=20)
+
+    tr = sub.add_parser('trend', help='One metric across recent runs of a kind')
+    tr.add_argument('--kind', required=True)
+    tr.add_argument('--metric', default='ttft.p95',
+                    help='name.stat, e.g. ttft.p95, or a plain name such as total or testflight:total')
+    tr.add_argument('--limit', type=int, default=20)
+
+    cmp = sub.add_parser('compare', help='Fail if a run regressed against a baseline')
+    cmp.add_argument('--kind', required=True)
+    cmp.add_argument('--baseline', default='previous', help="Run id, commit prefix, label or 'previous'")
+    cmp.add_argument('--candidate', default='latest', help="Run id, commit prefix, label or 'latest'")
+    cmp.add_argument('--check', action='append',
+                     help='Metric to gate on (repeatable; default ttft.p95, or total for release)')
+    cmp.add_argument('--threshold', type=float, default=0.10,
+                     help='Allowed relative increase before failing (0.10 = 10%%)')
+    cmp.add_argument('--error-tolerance', type=float, default=0.0,
+                     help='Allowed increase in error rate (errors per request, or error count for '
+                          'release runs) before failing')
+
+    rec = sub.add_parser('record', help='Record a run from the command line')
+    rec.add_argument('--kind', required=True)
+    rec.add_argument('--metric', action='append', default=[], help='name.stat=value or name=value (seconds)')
+    rec.add_argument('--timings', action='append', default=[],
+                     help='prefix=path of a release step-timings JSON file')
+    rec.add_argument('--errors', type=int, help='Number of failed steps or requests')
+    rec.add_argument('--label')
+    rec.add_argument('--target')
+
+    args = parser.parse_args()
+    conn = connect(args.results_db)
+    {"runs": cmd_runs, "trend": cmd_trend, "compare": cmd_compare, "record": cmd_record}[args.command](conn, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Scripted persona session
+Plays one persona's welcome + scripted turns against the chat API
+"""
+
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from chat_harness.assertions import PASS, TurnExpectation
+from chat_harness.client import (
+    BASE_URL, build_message_payload, build_welcome_payload, log,
+    post_welcome, stream_message
+)
+
+FALLBACK_WELCOME = "Hi! I'm here to help you figure out if Kull is a good fit."
+
+
+def new_session_id(persona_name: str) -> str:
+    """Unique session id so parallel runs of one persona never collide"""
+    return f"{persona_name}-test-{int(time.time())}-{uuid.uuid4().hex[:8]}"
+
+
+def run_session(persona: Dict[str, Any], base_url: str = BASE_URL,
+                session_id: Optional[str] = None, echo: bool = False,
+                early_cancel: bool = True,
+                on_turn: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Run the welcome call and every scripted turn for a persona
+
+    Returns a summary dict with per-turn results; "passed" is False if any
+    request failed or a turn missed its expect block or expectStep.
+
+    With early_cancel, a turn's stream is closed as soon as its expectations
+    are definitively met or broken; the partial reply is what goes into the
+    history for the following turns.
+
+    on_turn, if given, is called with each turn's result as soon as it ends.
+    """
+    session_id = session_id or new_session_id(persona["name"])
+    http = requests.Session()
+    conversation = []
+    turns = []
+    failures = []
+
+    welcome = post_welcome(build_welcome_payload(persona, session_id), base_url, session=http)
+    if welcome["message"]:
+        conversation.append({"role": "assistant", "content": welcome["message"]})
+    else:
+        if welcome["error"]:
+            failures.append(f"welcome: {welcome['error']}")
+        conversation.append({"role": "assistant", "content": FALLBACK_WELCOME})
+
+    for i, turn in enumerate(persona["turns"]):
+        label = turn.get("label", f"Turn {i + 1}")
+        if echo:
+            log(f"TURN {i + 1}: {label}")
+            log(f"User says: {turn['message']}")
+
+        conversation.append({"role": "user", "content": turn["message"]})
+        expectation = TurnExpectation(turn.get("expect"), turn.get("expectStep"))
+        result = stream_message(
+            build_message_payload(persona, session_id, turn["message"], conversation),
+            base_url, echo=echo, session=http,
+            stop_when=expectation.should_stop if early_cancel else None
+        )
+        result["finished_at"] = time.time()  # wall clock, for windowed stats (soak)
+        result["label"] = label
+        result["expectStep"] = turn.get("expectStep")
+        result["verdict"] = expectation.finish(result["text"], result["step"])
+        result["reason"] = expectation.reason
+        turns.append(result)
+        if on_turn:
+            on_turn(result)
+
+        if result["error"] or result["status"] != 200:
+            failures.append(f"turn {i + 1} ({label}): {result['error'] or result['status']}")
+        elif result["verdict"] != PASS:
+            failures.append(f"turn {i + 1} ({label}): {expectation.reason}")
+
+        if result["text"]:
+            conversation.append({"role": "assistant", "content": result["text"]})
+
+    return {
+        "persona": persona["name"],
+        "title": persona["title"],
+        "sessionId": session_id,
+        "welcome": welcome,
+        "turns": turns,
+        "failures": failures,
+        "passed": not failures
+    }
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Soak / Endurance Mode
+Sustains a weighted mix of persona sessions for a long period and reports
+latency and error rate per rolling window (--window long, reported every
+--step). Each window's TTFT and stream
+duration are tested against the first (baseline) window; a significant,
+material slowdown is flagged as drift. Optionally samples a server metrics
+or health endpoint each window so memory growth can be correlated with
+latency.
+
+Usage:
+    python3 -m chat_harness.soak --duration 4h --concurrency 8 --window 10m
+    python3 -m chat_harness.soak --mix jessica=3,chris=1 --metrics-url http://localhost:5000/metrics
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from chat_harness.client import BASE_URL, log
+from chat_harness.personas import list_personas, load_persona
+from chat_harness.results import add_results_args, latency_stats, record_from_args
+from chat_harness.session import run_session
+from chat_harness.stats import mann_whitney_greater, pearson, summarize
+
+# Drift is flagged only when it is both statistically significant and large
+# enough to matter: p below DRIFT_P_VALUE and the median up by DRIFT_MIN_RATIO
+DRIFT_P_VALUE = 0.01
+DRIFT_MIN_RATIO = 1.10
+
+# Metric names tried in order when --metrics-key is not given
+MEMORY_KEYS = ["process_resident_memory_bytes", "rss", "memory.rss", "heapUsed", "memory.heapUsed"]
+
+
+def parse_duration(value: str) -> float:
+    """Parse '90', '90s', '30m' or '4h' into seconds"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*", value)
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid duration: {value}")
+    scale = {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+    return float(match.group(1)) * scale
+
+
+def parse_mix(value: Optional[str]) -> Dict[str, float]:
+    """Parse 'jessica=3,chris=1' into persona weights (default: all equal)"""
+    if not value:
+        return {name: 1.0 for name in list_personas()}
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def flatten_numbers(data: Any, prefix: str = "") -> Dict[str, float]:
+    """Flatten nested JSON into dotted keys, keeping numeric leaves only"""
+    out = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            out.update(flatten_numbers(value, f"{prefix}{key}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        out[prefix.rstrip(".")] = float(data)
+    return out
+
+
+def parse_prometheus(text: str) -> Dict[str, float]:
+    """Parse unlabelled samples from Prometheus text exposition format"""
+    out = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split()
+        if len(parts) >= 2 and "{" not in parts[0]:
+            try:
+                out[parts[0]] = float(parts[1])
+            except ValueError:
+                pass
+    return out
+
+
+def sample_metrics(url: str, headers: Dict[str, str]) -> Dict[str, float]:
+    """Fetch a metrics/health endpoint and return its numeric values"""
+    try:
+        response = requests.get(url, headers=headers, timeout=5)
+        if response.status_code != 200:
+            return {}
+        if "json" in response.headers.get("Content-Type", ""):
+            return flatten_numbers(response.json())
+        return parse_prometheus(response.text)
+    except Exception:
+        return {}
+
+
+class SoakRecorder:
+    """Thread-safe store of per-turn samples"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: List[Dict[str, Any]] = []
+        self.sessions = 0
+        self.welcomes = 0
+        self.welcome_errors = 0
+
+    def record_turn(self, turn: Dict[str, Any]):
+        """Add one turn as soon as it ends, stamped with its completion time"""
+        with self.lock:
+            self.samples.append({
+                "t": turn["finished_at"],
+                "ttft": turn["ttft"],
+                "duration": turn["duration"],
+                "error": bool(turn["error"]) or turn["status"] != 200
+            })
+
+    def count_session(self, welcome: Dict[str, Any]):
+        with self.lock:
+            self.sessions += 1
+            self.welcomes += 1
+            self.welcome_errors += 1 if welcome["error"] else 0
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Copy of every sample so far (workers may still be appending)"""
+        with self.lock:
+            return list(self.samples)
+
+    def window(self, start: float, end: float) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [s for s in self.samples if start <= s["t"] < end]
+
+
+def soak_worker(personas: List[Dict[str, Any]], weights: List[float], base_url: str,
+                deadline: float, recorder: SoakRecorder, seed: Optional[int]):
+    """Run weighted-random persona sessions back to back until the deadline"""
+    rng = random.Random(seed)
+    while time.time() < deadline:
+        persona = rng.choices(personas, weights=weights)[0]
+        try:
+            # Full streams, so stream-duration drift tracks the server, not assertion failures
+            result = run_session(persona, base_url, early_cancel=False, on_turn=recorder.record_turn)
+            recorder.count_session(result["welcome"])
+        except Exception as e:
+            log(f"session crashed: {e}", "ERROR")
+
+
+def window_stats(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Latency summaries and error rate for one window"""
+    ok = [s for s in samples if not s["error"]]
+    return {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "error_rate": (len(samples) - len(ok)) / len(samples) if samples else 0.0,
+        "ttft": summarize([s["ttft"] for s in ok]),
+        "duration": summarize([s["duration"] for s in ok]),
+        "_ttft_values": [s["ttft"] for s in ok if s["ttft"] is not None],
+        "_duration_values": [s["duration"] for s in ok],
+    }
+
+
+def check_drift(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Compare a window against the baseline window; return drift descriptions"""
+    flags = []
+    for metric in ("ttft", "duration"):
+        base_values = baseline[f"_{metric}_values"]
+        values = current[f"_{metric}_values"]
+        p = mann_whitney_greater(base_values, values)
+        base_p50 = baseline[metric]["p50"]
+        p50 = current[metric]["p50"]
+        if p is None or not base_p50 or p50 is None:
+            continue
+        if p < DRIFT_P_VALUE and p50 >= base_p50 * DRIFT_MIN_RATIO:
+            flags.append(f"{metric} p50 {base_p50 * 1000:.0f}ms -> {p50 * 1000:.0f}ms (p={p:.4f})")
+    return flags
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sustained-load soak test for the chat API')
+    parser.add_argument('--base-url', default=BASE_URL, help='Chat server base URL')
+    parser.add_argument('--duration', type=parse_duration, default=parse_duration("1h"),
+                        help='Total soak time, e.g. 90m or 4h')
+    parser.add_argument('--window', type=parse_duration, default=parse_duration("5m"),
+                        help='Length of each rolling window, e.g. 5m')
+    parser.add_argument('--step', type=parse_duration,
+                        help='How often a window is reported (default: a fifth of --window)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent persona sessions')
+    parser.add_argument('--mix', help='Persona weights, e.g. jessica=3,chris=1 (default: all equal)')
+    parser.add_argument('--metrics-url', help='Metrics or health endpoint to sample each window')
+    parser.add_argument('--metrics-key', help='Memory metric name (dotted path for JSON)')
+    parser.add_argument('--metrics-header', action='append', default=[],
+                        help='Extra header for the metrics request, e.g. "Cookie: ..."')
+    parser.add_argument('--seed', type=int, help='Seed for persona selection')
+    parser.add_argument('--json', help='Write per-window results to this JSON file')
+    add_results_args(parser)
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    personas = [load_persona(name) for name in mix]
+    weights = list(mix.values())
+    step = args.step or args.window / 5
+    if step <= 0 or step > args.window:
+        parser.error("--step must be positive and no longer than --window")
+    metrics_headers = {}
+    for header in args.metrics_header:
+        key, sep, value = header.partition(":")
+        if not sep or not key.strip():
+            parser.error(f"--metrics-header must look like 'Name: value', got {header!r}")
+        metrics_headers[key.strip()] = value.strip()
+
+    log("=" * 60)
+    log(f"SOAK: {args.concurrency} sessions for {args.duration / 60:.0f} min, "
+        f"{args.window / 60:.1f} min windows every {step / 60:.1f} min")
+    log(f"Mix: {', '.join(f'{k}={v:g}' for k, v in mix.items())}")
+    log("=" * 60)
+
+    recorder = SoakRecorder()
+    start = time.time()
+    deadline = start + args.duration
+    workers = [
+        threading.Thread(
+            target=soak_worker,
+            args=(personas, weights, args.base_url, deadline, recorder,
+                  None if args.seed is None else args.seed + i),
+            daemon=True
+        )
+        for i in range(args.concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+
+    windows = []
+    baseline = None
+    window_end = start
+    try:
+        while window_end < deadline:
+            window_end = min(window_end + step, deadline)
+            time.sleep(max(window_end - time.time(), 0))
+
+            window_start = max(window_end - args.window, start)
+            stats = window_stats(recorder.window(window_start, window_end))
+            stats["start"] = window_start - start
+            stats["end"] = window_end - start
+            if args.metrics_url:
+                metrics = sample_metrics(args.metrics_url, metrics_headers)
+                keys = [args.metrics_key] if args.metrics_key else MEMORY_KEYS
+                stats["memory"] = next((metrics[k] for k in keys if k in metrics), None)
+
+            # The baseline is the first full-length window, so it isn't a
+            # thin sample from the first few steps
+            stats["drift"] = []
+            full = window_end - window_start >= args.window - 1e-6
+            if baseline is None and stats["requests"] and full:
+                baseline = stats
+            elif baseline is not None:
+                stats["drift"] = check_drift(baseline, stats)
+
+            ttft_p50 = stats["ttft"]["p50"]
+            ttft_p95 = stats["ttft"]["p95"]
+            memory = stats.get("memory")
+            log(f"[{stats['end'] / 60:6.1f}m] req={stats['requests']:>5} "
+                f"err={stats['error_rate'] * 100:5.1f}% "
+                f"ttft p50={ttft_p50 * 1000 if ttft_p50 else 0:6.0f}ms "
+                f"p95={ttft_p95 * 1000 if ttft_p95 else 0:6.0f}ms "
+                f"stream p50={(stats['duration']['p50'] or 0):5.2f}s"
+                + (f" mem={memory / 1e6:.0f}MB" if memory else ""))
+            for flag in stats["drift"]:
+                log(f"  DRIFT {flag}", "WARN")
+
+            windows.append(stats)
+    except KeyboardInterrupt:
+        log("Interrupted - reporting collected windows", "WARN")
+
+    for worker in workers:
+        worker.join(timeout=1)
+
+    samples = recorder.snapshot()
+    ok = [s for s in samples if not s["error"]]
+    drifted = [w for w in windows if w["drift"]]
+    total = len(samples)
+    errors = total - len(ok)
+
+    log("=" * 60)
+    log("SOAK REPORT")
+    log("=" * 60)
+    log(f"Sessions: {recorder.sessions}, turns: {total}, errors: {errors} "
+        f"({errors / total * 100 if total else 0:.1f}%)")
+    log(f"Windows with drift: {len(drifted)}/{len(windows)}")
+
+    mem_points = [(w["memory"], w["ttft"]["p50"]) for w in windows
+                  if w.get("memory") is not None and w["ttft"]["p50"] is not None]
+    if mem_points:
+        first, last = mem_points[0][0], mem_points[-1][0]
+        log(f"Memory: {first / 1e6:.0f}MB -> {last / 1e6:.0f}MB")
+        r = pearson([m for m, _ in mem_points], [t for _, t in mem_points])
+        if r is not None:
+            log(f"Memory vs TTFT p50 correlation: r={r:.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump([{k: v for k, v in w.items() if not k.startswith("_")} for w in windows],
+                      f, indent=2)
+        log(f"Results written to {args.json}")
+
+    record_from_args(args, "soak", {
+        "ttft": latency_stats([s["ttft"] for s in ok]),
+        "turn": latency_stats([s["duration"] for s in ok]),
+    }, sessions=recorder.sessions, requests=total + recorder.welcomes, errors=errors + recorder.welcome_errors,
+        elapsed=time.time() - start, target=args.base_url,
+        meta={"concurrency": args.concurrency, "window": args.window, "step": step,
+              "windows": len(windows), "drifted": len(drifted)})
+
+    if drifted:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
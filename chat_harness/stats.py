@@ -0,0 +1,169 @@
+"""
+Harness statistics
+Small pure-Python helpers (percentiles, curve fitting) shared by the
+benchmark modes so the harness has no numpy dependency
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def percentile(values: Sequence[float], p: float) -> Optional[float]:
+    """Linear-interpolated percentile (p in 0-100); None for no data"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return ordered[low]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: Sequence[float]) -> Dict[str, Optional[float]]:
+    """Count, mean and the usual latency percentiles"""
+    values = [v for v in values if v is not None]
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else None,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None
+    }
+
+
+def r_squared(ys: Sequence[float], predicted: Sequence[float]) -> float:
+    """Coefficient of determination for a fitted curve"""
+    mean = sum(ys) / len(ys)
+    total = sum((y - mean) ** 2 for y in ys)
+    if total == 0:
+        return 1.0
+    residual = sum((y - p) ** 2 for y, p in zip(ys, predicted))
+    return 1 - residual / total
+
+
+def linear_fit(xs: Sequence[float], ys: Sequence[float]) -> Dict[str, float]:
+    """Least-squares y = intercept + slope * x"""
+    n = len(xs)
+    if n < 2:
+        raise ValueError("linear_fit needs at least 2 points")
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    slope = sxy / sxx if sxx else 0.0
+    intercept = mean_y - slope * mean_x
+    predicted = [intercept + slope * x for x in xs]
+    return {"intercept": intercept, "slope": slope, "r2": r_squared(ys, predicted)}
+
+
+def _solve3(m: List[List[float]], v: List[float]) -> Tuple[float, float, float]:
+    """Solve a 3x3 linear system by Cramer's rule"""
+    def det(a):
+        return (a[0][0] * (a[1][1] * a[2][2] - a[1][2] * a[2][1])
+                - a[0][1] * (a[1][0] * a[2][2] - a[1][2] * a[2][0])
+                + a[0][2] * (a[1][0] * a[2][1] - a[1][1] * a[2][0]))
+
+    d = det(m)
+    if d == 0:
+        raise ValueError("singular system")
+    result = []
+    for col in range(3):
+        replaced = [row[:] for row in m]
+        for row in range(3):
+            replaced[row][col] = v[row]
+        result.append(det(replaced) / d)
+    return tuple(result)
+
+
+def quadratic_fit(xs: Sequence[float], ys: Sequence[float]) -> Dict[str, float]:
+    """Least-squares y = a + b * x + c * x^2"""
+    if len(xs) < 3:
+        raise ValueError("quadratic_fit needs at least 3 points")
+    sums = [sum(x ** k for x in xs) for k in range(5)]
+    m = [[sums[0], sums[1], sums[2]],
+         [sums[1], sums[2], sums[3]],
+         [sums[2], sums[3], sums[4]]]
+    v = [sum(y for y in ys),
+         sum(x * y for x, y in zip(xs, ys)),
+         sum(x * x * y for x, y in zip(xs, ys))]
+    a, b, c = _solve3(m, v)
+    predicted = [a + b * x + c * x * x for x in xs]
+    return {"a": a, "b": b, "c": c, "r2": r_squared(ys, predicted)}
+
+
+def find_knee(xs: Sequence[float], ys: Sequence[float], baseline_fraction: float = 0.3,
+              tolerance: float = 0.25, run: int = 3) -> Optional[float]:
+    """First x where y stops tracking the early linear trend
+
+    Fits a line to the first baseline_fraction of points, then returns the x
+    that starts the first `run` consecutive points exceeding that line by
+    more than `tolerance` (relative). None if growth stays linear.
+    """
+    n = max(int(len(xs) * baseline_fraction), 3)
+    if len(xs) <= n:
+        return None
+    base = linear_fit(xs[:n], ys[:n])
+
+    streak = 0
+    for i in range(n, len(xs)):
+        expected = base["intercept"] + base["slope"] * xs[i]
+        if expected > 0 and ys[i] > expected * (1 + tolerance):
+            streak += 1
+            if streak >= run:
+                return xs[i - run + 1]
+        else:
+            streak = 0
+    return None
+
+
+def pearson(xs: Sequence[float], ys: Sequence[float]) -> Optional[float]:
+    """Pearson correlation coefficient; None when either series is constant"""
+    n = len(xs)
+    if n < 3:
+        return None
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    syy = sum((y - mean_y) ** 2 for y in ys)
+    if sxx == 0 or syy == 0:
+        return None
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    return sxy / math.sqrt(sxx * syy)
+
+
+def mann_whitney_greater(baseline: Sequence[float], sample: Sequence[float]) -> Optional[float]:
+    """One-sided Mann-Whitney U test that `sample` is stochastically larger
+
+    Returns the p-value from the normal approximation (with tie correction),
+    or None when either group has fewer than 5 values.
+    """
+    n1, n2 = len(baseline), len(sample)
+    if n1 < 5 or n2 < 5:
+        return None
+
+    combined = sorted([(v, 0) for v in baseline] + [(v, 1) for v in sample])
+    ranks = [0.0] * len(combined)
+    ties = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        count = j - i + 1
+        ties += count ** 3 - count
+        i = j + 1
+
+    rank_sum = sum(r for r, (_, group) in zip(ranks, combined) if group == 1)
+    u = rank_sum - n2 * (n2 + 1) / 2
+    mean_u = n1 * n2 / 2
+    n = n1 + n2
+    var_u = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if var_u <= 0:
+        return None
+    z = (u - mean_u - 0.5) / math.sqrt(var_u)
+    return 0.5 * math.erfc(z / math.sqrt(2))
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Chat API Stand-in Server
+Deterministic local replacement for the real chat server so harness changes
+can be benchmarked offline and in CI. Implements:
+
+- POST /api/chat/welcome   JSON greeting, or {"skipped": true} when the
+                           conversation is active (same rule as server/routes.ts)
+- POST /api/chat/message   SSE stream: status events, content deltas in the
+                           delta (what server/routes.ts sends), content_delta
+                           or choices[].delta shape, usage, and a final 'done'
+                           event carrying currentStep
+- GET  /health             liveness plus request counters
+
+Usage:
+    python3 -m chat_harness.stub_server --port 5055 --ttft-ms 400 --tokens-per-sec 60
+    python3 -m chat_harness.stub_server --profile suite.json   # replay recorded latency
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 5055,
+    "ttft_ms": 300,            # delay before the first content delta
+    "tokens_per_sec": 50,      # streaming rate after the first token
+    "chunk_tokens": 1,         # tokens (words) per content delta
+    "response_tokens": 60,     # words per assistant reply
+    "chunk_shape": "delta",    # delta | content_delta | choices | mixed
+    "welcome_ms": 150,         # welcome endpoint latency
+    "context_ms_per_kb": 0.0,  # extra TTFT per KB of request body (context building)
+    "cache_discount": 0.0,     # fraction of TTFT saved when the prompt prefix was seen before
+    "error_rate": 0.0,         # fraction of requests answered with HTTP 500
+    "stream_error_rate": 0.0,  # fraction of streams that emit an error event mid-way
+    "skip_rate": 0.0,          # extra fraction of welcome calls answered 'skipped'
+    "seed": None,
+    "profile": None,           # list of {"ttft": s, "duration": s} samples to replay
+}
+
+FILLER_WORDS = (
+    "got it so you're spending a lot of time culling every week and that adds up "
+    "fast what would you do with those hours back if the sorting was handled for you"
+).split()
+
+
+def load_latency_profile(path: str) -> List[Dict[str, float]]:
+    """Load recorded latency samples
+
+    Accepts either a plain list of {"ttft", "duration"} objects or the JSON
+    written by `chat_harness.suite --json`, from which every turn is used.
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+
+    if isinstance(data, dict) and "results" in data:
+        samples = [
+            {"ttft": turn["ttft"], "duration": turn["duration"]}
+            for result in data["results"]
+            for turn in result.get("turns", [])
+            if turn.get("ttft") is not None and turn.get("duration") is not None
+        ]
+    else:
+        samples = list(data)
+
+    if not samples:
+        raise ValueError(f"{path}: no latency samples found")
+    return samples
+
+
+def is_conversation_active(history: List[Dict[str, Any]], current_time: int) -> bool:
+    """Mirror of isConversationActive() in the /api/chat/welcome handler"""
+    if not history:
+        return False
+
+    last = history[-1]
+    last_timestamp = last.get("timestamp") or current_time
+    if isinstance(last_timestamp, str):
+        # ISO timestamps are treated as "now"; the stand-in only needs the shape
+        last_timestamp = current_time
+    if last_timestamp > current_time - 2 * 60 * 1000:
+        return True
+
+    recent = history[-2:]
+    return (len(recent) >= 2 and recent[-1].get("role") == "assistant"
+            and recent[-2].get("role") == "user")
+
+
+class StubState:
+    """Shared counters and per-session step tracking"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.rng = random.Random(config["seed"])
+        self.lock = threading.Lock()
+        self.steps: Dict[str, int] = {}
+        self.prefixes = set()
+        self.counters = {"welcome": 0, "message": 0, "errors": 0, "skipped": 0}
+
+    def chance(self, rate: float) -> bool:
+        with self.lock:
+            return rate > 0 and self.rng.random() < rate
+
+    def sample_profile(self) -> Optional[Dict[str, float]]:
+        if not self.config["profile"]:
+            return None
+        with self.lock:
+            return self.rng.choice(self.config["profile"])
+
+    def prefix_seen(self, body: Dict[str, Any]) -> bool:
+        """Record a request's prompt prefix; True if it was already cached
+
+        The prefix is everything except the newest user message and the
+        per-request fields, like the system + history prefix a real prompt
+        cache keys on.
+        """
+        history = body.get("history") or []
+        prefix = json.dumps({
+            "history": history[:-1],
+            "calculatorData": body.get("calculatorData"),
+            "sectionHistory": body.get("sectionHistory"),
+            "userActivity": body.get("userActivity"),
+        }, sort_keys=True)
+        with self.lock:
+            seen = prefix in self.prefixes
+            self.prefixes.add(prefix)
+            return seen
+
+    def next_step(self, session_id: str) -> int:
+        with self.lock:
+            step = self.steps.get(session_id, 0) + 1
+            self.steps[session_id] = step
+            return step
+
+    def count(self, key: str):
+        with self.lock:
+            self.counters[key] += 1
+
+
+CHUNK_SHAPES = ["delta", "content_delta", "choices"]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Small SSE writes on a kept-alive connection would otherwise wait on
+    # Nagle + delayed ACK (~20-40ms), inflating TTFT for reused sessions
+    disable_nagle_algorithm = True
+    server_version = "KullChatStub/1.0"
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    @property
+    def state(self) -> StubState:
+        return self.server.state
+
+    def read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            return {}
+
+    def send_json(self, status: int, data: Dict[str, Any]):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def write_event(self, data: Dict[str, Any]):
+        """Write one SSE event as an HTTP/1.1 chunk"""
+        payload = f"data: {json.dumps(data)}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(payload):x}\r\n".encode("ascii") + payload + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/health":
+            with self.state.lock:
+                counters = dict(self.state.counters)
+            self.send_json(200, {"status": "ok", "counters": counters})
+        else:
+            self.send_json(404, {"message": "Not found"})
+
+    def do_POST(self):
+        if self.path == "/api/chat/welcome":
+            self.handle_welcome()
+        elif self.path == "/api/chat/message":
+            self.handle_message()
+        else:
+            self.send_json(404, {"message": "Not found"})
+
+    def handle_welcome(self):
+        config = self.state.config
+        body = self.read_json()
+        self.state.count("welcome")
+
+        if not body.get("context"):
+            self.send_json(400, {"message": "Context required"})
+            return
+
+        time.sleep(config["welcome_ms"] / 1000)
+
+        if self.state.chance(config["error_rate"]):
+            self.state.count("errors")
+            self.send_json(500, {"message": "Failed to generate greeting"})
+            return
+
+        current_time = body.get("currentTime") or int(time.time() * 1000)
+        if is_conversation_active(body.get("history") or [], current_time) or \
+                self.state.chance(config["skip_rate"]):
+            self.state.count("skipped")
+            self.send_json(200, {
+                "skipped": True,
+                "reason": "conversation_active",
+                "message": "Background message skipped - user is actively chatting"
+            })
+            return
+
+        self.send_json(200, {"message": "hey! saw you playing with the calculator - mind if i ask a few quick questions?"})
+
+    def handle_message(self):
+        config = self.state.config
+        body = self.read_json()
+        self.state.count("message")
+
+        if not body.get("message"):
+            self.send_json(400, {"message": "Message required"})
+            return
+
+        if self.state.chance(config["error_rate"]):
+            self.state.count("errors")
+            self.send_json(500, {"message": "Failed to process chat message"})
+            return
+
+        tokens = config["response_tokens"]
+        sample = self.state.sample_profile()
+        if sample:
+            ttft = sample["ttft"]
+            stream_time = max(sample["duration"] - sample["ttft"], 0)
+            token_delay = stream_time / max(tokens, 1)
+        else:
+            ttft = config["ttft_ms"] / 1000
+            token_delay = 1 / config["tokens_per_sec"] if config["tokens_per_sec"] > 0 else 0
+        request_kb = int(self.headers.get("Content-Length") or 0) / 1024
+        ttft += request_kb * config["context_ms_per_kb"] / 1000
+        prompt_tokens = len(json.dumps(body)) // 4
+        cached_tokens = 0
+        if self.state.prefix_seen(body):
+            cached_tokens = int(prompt_tokens * 0.9)
+            ttft *= 1 - config["cache_discount"]
+
+        fail_at = None
+        if self.state.chance(config["stream_error_rate"]):
+            fail_at = self.state.rng.randint(0, max(tokens - 1, 0))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            history = body.get("history") or []
+            self.write_event({"type": "status", "message": f"✅ server received: {len(history)} messages"})
+            time.sleep(ttft)
+
+            words = [FILLER_WORDS[i % len(FILLER_WORDS)] for i in range(tokens)]
+            chunk_tokens = max(config["chunk_tokens"], 1)
+            for i in range(0, tokens, chunk_tokens):
+                if fail_at is not None and i >= fail_at:
+                    self.state.count("errors")
+                    self.write_event({"type": "error", "message": "Stream processing error"})
+                    break
+
+                content = " ".join(words[i:i + chunk_tokens]) + " "
+                shape = config["chunk_shape"]
+                if shape == "mixed":
+                    shape = CHUNK_SHAPES[(i // chunk_tokens) % len(CHUNK_SHAPES)]
+                if shape == "choices":
+                    self.write_event({"choices": [{"delta": {"content": content}}]})
+                else:
+                    self.write_event({"type": shape, "content": content})
+
+                if i + chunk_tokens < tokens:
+                    time.sleep(token_delay * chunk_tokens)
+
+            self.write_event({"usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens}
+            }})
+            self.write_event({"type": "done", "currentStep": self.state.next_step(body.get("sessionId", ""))})
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the stream
+            self.close_connection = True
+
+
+def make_server(**overrides) -> ThreadingHTTPServer:
+    """Create (but don't start) a stand-in server; overrides update DEFAULT_CONFIG"""
+    config = dict(DEFAULT_CONFIG, **overrides)
+    server = ThreadingHTTPServer((config["host"], config["port"]), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(config)
+    return server
+
+
+def serve_in_background(**overrides) -> ThreadingHTTPServer:
+    """Start a stand-in server on a daemon thread; port=0 picks a free port
+
+    The base URL is available as f"http://{host}:{server.server_address[1]}".
+    Call server.shutdown() when done.
+    """
+    server = make_server(**overrides)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def base_url_for(server: ThreadingHTTPServer) -> str:
+    """Base URL clients should use for a running stand-in server"""
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the chat API')
+    parser.add_argument('--host', default=DEFAULT_CONFIG["host"])
+    parser.add_argument('--port', type=int, default=DEFAULT_CONFIG["port"])
+    parser.add_argument('--ttft-ms', type=float, default=DEFAULT_CONFIG["ttft_ms"])
+    parser.add_argument('--tokens-per-sec', type=float, default=DEFAULT_CONFIG["tokens_per_sec"])
+    parser.add_argument('--chunk-tokens', type=int, default=DEFAULT_CONFIG["chunk_tokens"])
+    parser.add_argument('--response-tokens', type=int, default=DEFAULT_CONFIG["response_tokens"])
+    parser.add_argument('--chunk-shape', choices=CHUNK_SHAPES + ['mixed'],
+                        default=DEFAULT_CONFIG["chunk_shape"])
+    parser.add_argument('--welcome-ms', type=float, default=DEFAULT_CONFIG["welcome_ms"])
+    parser.add_argument('--context-ms-per-kb', type=float, default=DEFAULT_CONFIG["context_ms_per_kb"])
+    parser.add_argument('--cache-discount', type=float, default=DEFAULT_CONFIG["cache_discount"])
+    parser.add_argument('--error-rate', type=float, default=DEFAULT_CONFIG["error_rate"])
+    parser.add_argument('--stream-error-rate', type=float, default=DEFAULT_CONFIG["stream_error_rate"])
+    parser.add_argument('--skip-rate', type=float, default=DEFAULT_CONFIG["skip_rate"])
+    parser.add_argument('--seed', type=int, help='Seed for error injection and profile sampling')
+    parser.add_argument('--profile', help='Replay latency from a samples file or suite --json output')
+    args = parser.parse_args()
+
+    overrides = vars(args)
+    if args.profile:
+        overrides["profile"] = load_latency_profile(args.profile)
+
+    server = make_server(**overrides)
+    print(f"Chat stand-in listening on {base_url_for(server)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
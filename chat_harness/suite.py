@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Parallel Persona Suite
+Runs every persona in the catalogue against the chat API, one worker process
+per persona, and reports step transitions and latency per turn.
+
+Usage:
+    python3 -m chat_harness.suite
+    python3 -m chat_harness.suite --persona jessica --persona chris --workers 2
+    python3 -m chat_harness.suite --capture traffic.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict
+
+from chat_harness.capture import CAPTURE_ENV
+from chat_harness.client import BASE_URL, log
+from chat_harness.personas import load_catalogue
+from chat_harness.results import add_results_args, latency_stats, record_from_args
+from chat_harness.session import run_session
+
+
+def run_persona(persona: Dict[str, Any], base_url: str, early_cancel: bool = True) -> Dict[str, Any]:
+    """Worker entry point (must be module-level so it pickles)"""
+    start = time.perf_counter()
+    try:
+        result = run_session(persona, base_url, early_cancel=early_cancel)
+    except Exception as e:
+        result = {
+            "persona": persona["name"],
+            "title": persona["title"],
+            "turns": [],
+            "failures": [f"crashed: {e}"],
+            "passed": False
+        }
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def print_result(result: Dict[str, Any]):
+    """Print one persona's turn table"""
+    status = "PASS" if result["passed"] else "FAIL"
+    log(f"{result['title']}: {status} ({result['elapsed']:.1f}s)")
+    for turn in result["turns"]:
+        ttft = f"{turn['ttft'] * 1000:.0f}ms" if turn["ttft"] is not None else "-"
+        log(f"  {turn['label']:<22} {turn['verdict'].upper():<4} step={turn['step']} "
+            f"expected={turn['expectStep']} ttft={ttft} total={turn['duration']:.2f}s"
+            + (" (cancelled early)" if turn["cancelled"] else ""))
+    for failure in result["failures"]:
+        log(f"  {failure}", "ERROR")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the persona suite in parallel')
+    parser.add_argument('--base-url', default=BASE_URL, help='Chat server base URL')
+    parser.add_argument('--persona', action='append', help='Persona name (repeatable, default: all)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per persona)')
+    parser.add_argument('--no-early-cancel', action='store_true',
+                        help='Read every stream to the end even once a turn has passed or failed')
+    parser.add_argument('--json', help='Write full results to this JSON file')
+    parser.add_argument('--capture', help='Append every request to this capture file for replay (.jsonl)')
+    add_results_args(parser)
+    args = parser.parse_args()
+
+    if args.capture:
+        if args.capture.endswith(".gz"):
+            parser.error("--capture must be a plain .jsonl file: every worker process appends to it")
+        # Inherited by the worker processes; each appends its own lines
+        os.environ[CAPTURE_ENV] = args.capture
+
+    personas = load_catalogue(args.persona)
+    workers = args.workers or len(personas)
+
+    log("=" * 60)
+    log(f"PERSONA SUITE: {len(personas)} personas on {workers} workers")
+    log("=" * 60)
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_persona, p, args.base_url, not args.no_early_cancel) for p in personas]
+        for future in as_completed(futures):
+            result = future.result()
+            print_result(result)
+            results.append(result)
+    elapsed = time.perf_counter() - start
+
+    passed = sum(1 for r in results if r["passed"])
+    log("=" * 60)
+    log(f"{passed}/{len(results)} personas passed in {elapsed:.1f}s")
+    log("=" * 60)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"elapsed": elapsed, "results": results}, f, indent=2)
+        log(f"Results written to {args.json}")
+
+    turns = [t for r in results for t in r["turns"]]
+    welcomes = [r["welcome"] for r in results if r.get("welcome")]
+    record_from_args(args, "suite", {
+        "ttft": latency_stats([t["ttft"] for t in turns]),
+        "turn": latency_stats([t["duration"] for t in turns]),
+        "welcome": latency_stats([w["latency"] for w in welcomes if not w["error"]]),
+    }, sessions=len(results), requests=len(turns) + len(welcomes),
+        errors=sum(1 for t in turns if t["error"] or t["status"] != 200) + sum(1 for w in welcomes if w["error"]),
+        elapsed=elapsed, target=args.base_url, meta={"personas": len(results), "passed": passed})
+
+    if passed != len(results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
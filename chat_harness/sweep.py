@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Payload-Shape Latency Sweep
+Generates thousands of variants of the context blocks the browser sends
+(calculatorData, sectionHistory, userActivity, timeOnSite) and measures
+server latency for each, then buckets the results by input size and by
+each shape dimension so expensive inputs show up before visitors hit them.
+
+Variants use the shapes the server analyzers expect: sections are
+{id, title, totalTimeSpent, visitCount}, activity events
+{type, target, value, timestamp}. Sizes are drawn log-uniformly so small
+and very large inputs are both well represented. Every variant is built
+up front, so payload generation never lands inside the timed region.
+
+For the message endpoint latency is TTFT and the stream is cancelled at
+the first token; for welcome it is the full response time.
+
+Usage:
+    python3 -m chat_harness.sweep --count 2000 --concurrency 8
+    python3 -m chat_harness.sweep --endpoint welcome --max-activity 20000 --json sweep.json
+    python3 -m chat_harness.sweep --stub --stub-context-ms-per-kb 10
+"""
+
+import argparse
+import copy
+import json
+import math
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+import requests
+
+from chat_harness.client import (
+    BASE_URL, build_message_payload, build_welcome_payload, log,
+    post_welcome, stream_message
+)
+from chat_harness.personas import load_persona
+from chat_harness.results import add_results_args, latency_stats, record_from_args
+from chat_harness.session import FALLBACK_WELCOME, new_session_id
+from chat_harness.stats import pearson, summarize
+
+# Section ids the server's timing analyzer knows about
+SECTION_IDS = ["hero", "problem", "calculator", "value", "features", "solution", "testimonials",
+               "referrals", "value-stack", "pricing", "faq", "final-cta", "download"]
+
+ACTIVITY_TYPES = ["click", "hover", "input", "select", "scroll"]
+
+ACTIVITY_TARGETS = ["calculator-shoots", "calculator-hours", "calculator-rate", "pricing-card",
+                    "plan-toggle", "cta-start-trial", "download-button", "faq-item", "privacy-link",
+                    "security-badge", "testimonial-carousel", "feature-demo", "nav-menu"]
+
+
+def log_uniform_int(rng: random.Random, high: int) -> int:
+    """0..high, spread evenly over orders of magnitude"""
+    if high <= 0:
+        return 0
+    return int(math.exp(rng.uniform(0, math.log(high + 1)))) - 1
+
+
+def generate_variant(rng: random.Random, max_sections: int, max_activity: int,
+                     max_time_on_site: int) -> Dict[str, Any]:
+    """One random input shape"""
+    time_on_site = log_uniform_int(rng, max_time_on_site)
+    start = int(time.time() * 1000) - time_on_site
+
+    sections = rng.sample(SECTION_IDS, min(rng.randint(0, max_sections), len(SECTION_IDS)))
+    section_history = [{
+        "id": section,
+        "title": section.replace("-", " ").title(),
+        "totalTimeSpent": log_uniform_int(rng, max(time_on_site // max(len(sections), 1), 1)),
+        "visitCount": rng.randint(1, 12),
+        "visited": True,
+    } for section in sections]
+
+    activity = []
+    for _ in range(log_uniform_int(rng, max_activity)):
+        kind = rng.choice(ACTIVITY_TYPES)
+        event = {
+            "type": kind,
+            "target": rng.choice(ACTIVITY_TARGETS),
+            "timestamp": start + rng.randint(0, max(time_on_site, 1)),
+        }
+        if kind in ("input", "select"):
+            event["value"] = str(rng.randint(0, 500))
+        activity.append(event)
+    activity.sort(key=lambda e: e["timestamp"])
+
+    calculator = {
+        "shootsPerWeek": rng.choice([0, 1, 2, 3, 5, 10, 25, 100]),
+        "hoursPerShoot": rng.choice([0, 0.5, 1, 2, 4, 6, 12, 48]),
+        "billableRate": rng.choice([0, 25, 50, 100, 250, 1000, 10000]),
+        "hasManuallyAdjusted": rng.random() < 0.5,
+        "hasClickedPreset": rng.random() < 0.5,
+    }
+    calculator["annualCost"] = round(calculator["shootsPerWeek"] * calculator["hoursPerShoot"]
+                                     * 44 * calculator["billableRate"])
+
+    return {
+        "sections": len(section_history),
+        "activity": len(activity),
+        "timeOnSite": time_on_site,
+        "annualCost": calculator["annualCost"],
+        "calculatorData": calculator,
+        "sectionHistory": section_history,
+        "userActivity": activity,
+    }
+
+
+def variant_persona(base: Dict[str, Any], variant: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a persona carrying a variant's context blocks"""
+    persona = copy.deepcopy(base)
+    persona["calculatorData"] = variant["calculatorData"]
+    persona["sectionHistory"] = variant["sectionHistory"]
+    persona["userActivity"] = variant["userActivity"]
+    persona["context"]["timeOnSite"] = variant["timeOnSite"]
+    persona["context"]["userActivity"] = variant["userActivity"]
+    return persona
+
+
+def measure_variant(base: Dict[str, Any], variant: Dict[str, Any], endpoint: str, base_url: str,
+                    timeout: float, http: requests.Session) -> Dict[str, Any]:
+    """Send one variant and return its result row (no context blocks)"""
+    persona = variant_persona(base, variant)
+    session_id = new_session_id(f"{base['name']}-sweep")
+    if endpoint == "welcome":
+        result = post_welcome(build_welcome_payload(persona, session_id), base_url, timeout, session=http)
+        latency = result["latency"] if not result["error"] else None
+    else:
+        message = base["turns"][0]["message"]
+        history = [{"role": "assistant", "content": FALLBACK_WELCOME}, {"role": "user", "content": message}]
+        payload = build_message_payload(persona, session_id, message, history)
+        result = stream_message(payload, base_url, timeout, session=http, stop_when=lambda text: True)
+        latency = result["ttft"]
+
+    row = {k: variant[k] for k in ("sections", "activity", "timeOnSite", "annualCost")}
+    row.update({
+        "request_bytes": result["request_bytes"],
+        "latency": latency,
+        "status": result["status"],
+        "error": result["error"] if result["error"] or result["status"] != 200 else None,
+    })
+    return row
+
+
+def run_sweep(base: Dict[str, Any], variants: List[Dict[str, Any]], endpoint: str, concurrency: int,
+              base_url: str = BASE_URL, timeout: float = 60) -> List[Dict[str, Any]]:
+    """Measure every variant, `concurrency` at a time"""
+    local = threading.local()
+    done = [0]
+    lock = threading.Lock()
+
+    def task(variant):
+        if not hasattr(local, "http"):
+            local.http = requests.Session()
+        row = measure_variant(base, variant, endpoint, base_url, timeout, local.http)
+        with lock:
+            done[0] += 1
+            if done[0] % 100 == 0:
+                log(f"  {done[0]}/{len(variants)} variants")
+        return row
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(task, variants))
+
+
+def size_bucket(n: int) -> str:
+    """Power-of-two KB bucket label for a byte count"""
+    if n < 1024:
+        return "<1KB"
+    low = 2 ** int(math.log2(n / 1024))
+    return f"{low}-{low * 2}KB"
+
+
+def decade_bucket(n: float) -> str:
+    """0, 1-9, 10-99, ... bucket label"""
+    if n <= 0:
+        return "0"
+    low = 10 ** int(math.log10(n))
+    return f"{low}-{low * 10 - 1}"
+
+
+def time_bucket(ms: int) -> str:
+    """Time-on-site bucket label"""
+    for limit, label in ((60_000, "<1m"), (300_000, "1-5m"), (1_800_000, "5-30m"), (7_200_000, "30m-2h")):
+        if ms < limit:
+            return label
+    return "2h+"
+
+
+# Report dimension -> (raw row field, bucket label function)
+DIMENSIONS: Dict[str, Tuple[str, Callable[[Any], Any]]] = {
+    "request size": ("request_bytes", size_bucket),
+    "activity events": ("activity", decade_bucket),
+    "sections visited": ("sections", lambda n: n),
+    "time on site": ("timeOnSite", time_bucket),
+    "annual cost ($)": ("annualCost", decade_bucket),
+}
+
+
+def bucket_report(rows: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Latency summary per bucket, for every dimension"""
+    report = {}
+    for dimension, (field, label) in DIMENSIONS.items():
+        groups: Dict[Any, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(label(row[field]), []).append(row)
+        # Labels don't sort numerically; order buckets by their smallest member
+        order = sorted(groups, key=lambda b: min(r[field] for r in groups[b]))
+        report[dimension] = [dict(bucket=str(b), errors=sum(1 for r in groups[b] if r["error"]),
+                                  **summarize([r["latency"] for r in groups[b] if not r["error"]]))
+                             for b in order]
+    return report
+
+
+def correlations(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Pearson r between latency and each raw input dimension"""
+    ok = [r for r in rows if r["latency"] is not None and not r["error"]]
+    ys = [r["latency"] for r in ok]
+    return {field: pearson([float(r[field]) for r in ok], ys) for field, _ in DIMENSIONS.values()}
+
+
+def print_report(report: Dict[str, List[Dict[str, Any]]], corr: Dict[str, Any],
+                 rows: List[Dict[str, Any]], top: int):
+    """Bucket tables, correlations and the slowest shapes"""
+    def ms(v):
+        return f"{v * 1000:7.0f}ms" if v is not None else "        -"
+
+    for dimension, buckets in report.items():
+        log(f"By {dimension}:")
+        log(f"  {'bucket':<20} {'count':>6} {'errors':>6} {'p50':>9} {'p95':>9} {'max':>9}")
+        for b in buckets:
+            log(f"  {b['bucket']:<20} {b['count']:>6} {b['errors']:>6} {ms(b['p50'])} {ms(b['p95'])} {ms(b['max'])}")
+        log("")
+
+    log("Correlation with latency (Pearson r):")
+    for key, r in corr.items():
+        log(f"  {key:<14} {'-' if r is None else f'{r:+.2f}'}")
+    log("")
+
+    slowest = sorted((r for r in rows if r["latency"] is not None), key=lambda r: -r["latency"])[:top]
+    log(f"Slowest {len(slowest)} shapes:")
+    for r in slowest:
+        log(f"  {ms(r['latency'])}  {r['request_bytes']:>8}B  activity={r['activity']:<6} "
+            f"sections={r['sections']:<3} timeOnSite={r['timeOnSite'] // 1000}s annualCost=${r['annualCost']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep payload shapes and bucket latency by input size')
+    parser.add_argument('--base-url', default=BASE_URL, help='Chat server base URL')
+    parser.add_argument('--persona', default='jessica', help='Persona supplying the message and profile')
+    parser.add_argument('--endpoint', choices=['message', 'welcome'], default='message')
+    parser.add_argument('--count', type=int, default=1000, help='Number of variants')
+    parser.add_argument('--concurrency', type=int, default=4, help='Requests in flight')
+    parser.add_argument('--max-sections', type=int, default=len(SECTION_IDS), help='Most sections visited')
+    parser.add_argument('--max-activity', type=int, default=5000, help='Longest activity log (events)')
+    parser.add_argument('--max-time-on-site', type=int, default=4 * 3600 * 1000, help='Longest timeOnSite (ms)')
+    parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=1, help='Variant generator seed')
+    parser.add_argument('--top', type=int, default=10, help='How many slowest shapes to list')
+    parser.add_argument('--json', help='Write per-variant rows and bucket summaries to this JSON file')
+    parser.add_argument('--stub', action='store_true', help='Run against an in-process stand-in server')
+    parser.add_argument('--stub-context-ms-per-kb', type=float, default=5.0,
+                        help='Stand-in context-building cost per KB of request')
+    add_results_args(parser)
+    args = parser.parse_args()
+
+    base = load_persona(args.persona)
+    base_url = args.base_url
+    server = None
+    if args.stub:
+        from chat_harness.stub_server import base_url_for, serve_in_background
+        server = serve_in_background(port=0, ttft_ms=50, tokens_per_sec=0, welcome_ms=50,
+                                     skip_rate=0, error_rate=0, stream_error_rate=0,
+                                     context_ms_per_kb=args.stub_context_ms_per_kb)
+        base_url = base_url_for(server)
+
+    rng = random.Random(args.seed)
+    variants = [generate_variant(rng, args.max_sections, args.max_activity, args.max_time_on_site)
+                for _ in range(args.count)]
+
+    log("=" * 60)
+    log(f"PAYLOAD SWEEP: {len(variants)} variants on /api/chat/{args.endpoint} "
+        f"({args.concurrency} in flight) against {base_url}")
+    log("=" * 60)
+
+    start = time.perf_counter()
+    try:
+        rows = run_sweep(base, variants, args.endpoint, args.concurrency, base_url, args.timeout)
+    finally:
+        if server:
+            server.shutdown()
+    elapsed = time.perf_counter() - start
+
+    report = bucket_report(rows)
+    corr = correlations(rows)
+    errors = sum(1 for r in rows if r["error"])
+
+    log("=" * 60)
+    log(f"SWEEP REPORT ({'TTFT' if args.endpoint == 'message' else 'welcome latency'})")
+    log("=" * 60)
+    log(f"Variants: {len(rows)} in {elapsed:.1f}s, errors: {errors}")
+    log("")
+    print_report(report, corr, rows, args.top)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"endpoint": args.endpoint, "seed": args.seed, "elapsed": elapsed,
+                       "buckets": report, "correlations": corr, "rows": rows}, f, indent=2)
+        log(f"Results written to {args.json}")
+
+    record_from_args(args, "sweep", {
+        "ttft" if args.endpoint == "message" else "welcome": latency_stats([r["latency"] for r in rows if not r["error"]]),
+    }, sessions=len(rows), requests=len(rows), errors=errors, elapsed=elapsed, target=base_url,
+        meta={"endpoint": args.endpoint, "count": args.count, "seed": args.seed, "stub": args.stub})
+
+    if errors:
+        log(f"{errors} variants failed", "ERROR")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,11 +6,13 @@ Automates the process of creating a Developer ID certificate via Apple's API
 import jwt
 import time
 import requests
-import subprocess
 import tempfile
 import os
 import base64
 import sys
+import argparse
+
+from release_deadline import EXIT_DEADLINE, CommandTimedOut, Deadline, DeadlineExceeded
 
 # Credentials (same as testflight_setup.py)
 KEY_ID = "S9KW8G5RHS"
@@ -22,6 +24,13 @@ CERT_TYPE = "DEVELOPER_ID_APPLICATION"  # For signing apps distributed outside A
 CERT_EMAIL = "steve@lander.media"
 CERT_NAME = "Stephen Moraco"
 
+# Time budget for the whole run; API calls and subprocesses get what is left
+DEADLINE_MINUTES = 10
+HTTP_TIMEOUT_SECONDS = 30
+SUBPROCESS_TIMEOUT_SECONDS = 60
+
+deadline = Deadline()
+
 def get_token():
     """Generate JWT token for Apple Developer API"""
     try:
@@ -45,7 +54,13 @@ def api_get(path):
     """Make GET request to App Store Connect API"""
     token = get_token()
     headers = {'Authorization': f'Bearer {token}'}
-    response = requests.get(f'https://api.appstoreconnect.apple.com{path}', headers=headers)
+    try:
+        response = requests.get(f'https://api.appstoreconnect.apple.com{path}', headers=headers,
+                                timeout=deadline.timeout(HTTP_TIMEOUT_SECONDS))
+    except requests.RequestException as e:
+        deadline.check()
+        print(f"GET {path} failed: {e}")
+        return None
 
     if response.status_code != 200:
         print(f"GET {path} failed: {response.status_code}")
@@ -58,7 +73,13 @@ def api_post(path, data):
     """Make POST request to App Store Connect API"""
     token = get_token()
     headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
-    response = requests.post(f'https://api.appstoreconnect.apple.com{path}', headers=headers, json=data)
+    try:
+        response = requests.post(f'https://api.appstoreconnect.apple.com{path}', headers=headers, json=data,
+                                 timeout=deadline.timeout(HTTP_TIMEOUT_SECONDS))
+    except requests.RequestException as e:
+        deadline.check()
+        print(f"POST {path} failed: {e}")
+        return None
 
     if response.status_code not in [200, 201]:
         print(f"POST {path} failed: {response.status_code}")
@@ -77,20 +98,20 @@ def generate_csr():
     csr_path = os.path.join(temp_dir, "cert_request.csr")
 
     # Generate private key
-    subprocess.run([
+    deadline.run([
         "openssl", "genrsa",
         "-out", key_path,
         "2048"
-    ], check=True, capture_output=True)
+    ], SUBPROCESS_TIMEOUT_SECONDS, check=True, capture_output=True)
 
     # Generate CSR
-    subprocess.run([
+    deadline.run([
         "openssl", "req",
         "-new",
         "-key", key_path,
         "-out", csr_path,
         "-subj", f"/emailAddress={CERT_EMAIL}/CN={CERT_NAME}/C=US"
-    ], check=True, capture_output=True)
+    ], SUBPROCESS_TIMEOUT_SECONDS, check=True, capture_output=True)
 
     # Read CSR content
     with open(csr_path, 'r') as f:
@@ -98,7 +119,7 @@ def generate_csr():
 
     # Store private key path for later use
     permanent_key_path = os.path.expanduser("~/.private_keys/developer_id_private_key.key")
-    subprocess.run(["cp", key_path, permanent_key_path], check=True)
+    deadline.run(["cp", key_path, permanent_key_path], SUBPROCESS_TIMEOUT_SECONDS, check=True)
     os.chmod(permanent_key_path, 0o600)
     print(f"  Private key saved to: {permanent_key_path}")
 
@@ -163,19 +184,19 @@ def download_and_install_certificate(cert_id, cert_content):
     print(f"  Certificate saved to: {cert_path}")
 
     # Import to keychain
-    result = subprocess.run([
+    result = deadline.run([
         "security", "import", cert_path,
         "-k", os.path.expanduser("~/Library/Keychains/login.keychain-db"),
         "-T", "/usr/bin/codesign",
         "-T", "/usr/bin/productsign"
-    ], capture_output=True, text=True)
+    ], SUBPROCESS_TIMEOUT_SECONDS, capture_output=True, text=True)
 
     if result.returncode == 0:
         print("  Certificate imported to keychain!")
     else:
         print(f"  Import may have failed: {result.stderr}")
         # Try alternate method
-        subprocess.run(["open", cert_path], check=True)
+        deadline.run(["open", cert_path], SUBPROCESS_TIMEOUT_SECONDS, check=True)
         print("  Opened certificate in Keychain Access - please approve if prompted")
 
     return cert_path
@@ -184,9 +205,9 @@ def verify_installation():
     """Verify the certificate is properly installed"""
     print("\nVerifying installation...")
 
-    result = subprocess.run(
+    result = deadline.run(
         ["security", "find-identity", "-v", "-p", "codesigning"],
-        capture_output=True, text=True
+        SUBPROCESS_TIMEOUT_SECONDS, capture_output=True, text=True
     )
 
     if "Developer ID Application" in result.stdout:
@@ -203,35 +224,73 @@ def verify_installation():
         return False
 
 def main():
+    parser = argparse.ArgumentParser(description='Create and install a Developer ID Application certificate')
+    parser.add_argument('--deadline-minutes', type=float, default=DEADLINE_MINUTES,
+                        help='Time budget for the whole run; every API call and command is bounded by what is left')
+    parser.add_argument('--timings-json', help='Write per-step timings to this JSON file')
+    args = parser.parse_args()
+
+    global deadline
+    deadline = Deadline(args.deadline_minutes * 60)
+    try:
+        setup_certificate()
+    except DeadlineExceeded as e:
+        print("\n" + "=" * 60)
+        print("✗ CERTIFICATE SETUP ABORTED - TIME BUDGET EXCEEDED")
+        print("=" * 60)
+        print(f"  {e}")
+        deadline.report()
+        sys.exit(EXIT_DEADLINE)
+    except CommandTimedOut as e:
+        print("\n" + "=" * 60)
+        print("✗ CERTIFICATE SETUP ABORTED - COMMAND TIMED OUT")
+        print("=" * 60)
+        print(f"  {e}")
+        deadline.report()
+        sys.exit(1)
+    finally:
+        if args.timings_json:
+            deadline.save(args.timings_json)
+    deadline.report()
+
+def setup_certificate():
+    """Everything the script does; runs inside the deadline"""
     print("=" * 60)
     print("DEVELOPER ID APPLICATION CERTIFICATE SETUP")
     print("=" * 60)
 
     # Check for existing certificate
-    existing = check_existing_certificates()
+    with deadline.step("check existing certificates"):
+        existing = check_existing_certificates()
 
     if existing:
         cert_content = existing['attributes'].get('certificateContent', '')
         if cert_content:
             print("\nUsing existing certificate...")
-            cert_path = download_and_install_certificate(existing['id'], cert_content)
+            with deadline.step("install certificate"):
+                cert_path = download_and_install_certificate(existing['id'], cert_content)
         else:
             print("\nExisting certificate found but needs to be downloaded from Apple Developer Portal")
             print("The API returned certificate without content - fetching full details...")
 
             # Get full certificate details
-            cert_details = api_get(f"/v1/certificates/{existing['id']}")
+            with deadline.step("fetch certificate details"):
+                cert_details = api_get(f"/v1/certificates/{existing['id']}")
             if cert_details and 'data' in cert_details:
                 cert_content = cert_details['data']['attributes'].get('certificateContent', '')
                 if cert_content:
-                    cert_path = download_and_install_certificate(existing['id'], cert_content)
+                    with deadline.step("install certificate"):
+                        cert_path = download_and_install_certificate(existing['id'], cert_content)
     else:
         # Generate CSR and create new certificate
-        csr_content, key_path = generate_csr()
-        cert_id, cert_content = create_certificate(csr_content)
+        with deadline.step("generate CSR"):
+            csr_content, key_path = generate_csr()
+        with deadline.step("create certificate"):
+            cert_id, cert_content = create_certificate(csr_content)
 
         if cert_id and cert_content:
-            cert_path = download_and_install_certificate(cert_id, cert_content)
+            with deadline.step("install certificate"):
+                cert_path = download_and_install_certificate(cert_id, cert_content)
         else:
             print("\nERROR: Failed to create certificate")
             print("You may need to create it manually at:")
@@ -239,8 +298,10 @@ def main():
             sys.exit(1)
 
     # Verify
-    time.sleep(2)  # Give keychain time to update
-    if verify_installation():
+    with deadline.step("verify installation"):
+        deadline.sleep(2)  # Give keychain time to update
+        installed = verify_installation()
+    if installed:
         print("\n" + "=" * 60)
         print("SETUP COMPLETE!")
         print("=" * 60)
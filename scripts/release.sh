@@ -7,6 +7,30 @@ set -e
 # DMG creation happens IN PARALLEL with TestFlight polling
 # ============================================
 
+RELEASE_START=$(date +%s)
+
+# Record release timing for trend / regression checks on every exit path,
+# including failed and timed-out releases (never changes the exit status)
+record_release() {
+    local status=$?
+    local seconds=$(( $(date +%s) - RELEASE_START ))
+    local testflight="${TESTFLIGHT_RESULT:-not_run}"
+    local dmg="${DMG_RESULT:-not_run}"
+    local errors=0
+    [ $status -eq 0 ] || errors=$((errors + 1))
+    case "$testflight" in success) ;; *) errors=$((errors + 1)) ;; esac
+    case "$dmg" in success|success_no_upload) ;; *) errors=$((errors + 1)) ;; esac
+    local timings=()
+    if [ -s "${TESTFLIGHT_TIMINGS_FILE:-}" ]; then
+        timings=(--timings "testflight=$TESTFLIGHT_TIMINGS_FILE")
+    fi
+    (cd "$PROJECT_ROOT" && python3 -m chat_harness.results record --kind release \
+        --label "${FULL_VERSION:-unversioned}" --errors "$errors" \
+        --target "exit=$status testflight=$testflight dmg=$dmg" --metric "total=$seconds" \
+        "${timings[@]}") || echo "  ⚠ Could not record release timing"
+    rm -f "${TESTFLIGHT_TIMINGS_FILE:-}"
+}
+
 # Configuration
 PROJECT_ROOT="/Users/stevemoraco/Lander Dropbox/Steve Moraco/Mac (6)/Downloads/ai image culling/kull"
 
@@ -14,6 +38,7 @@ PROJECT_ROOT="/Users/stevemoraco/Lander Dropbox/Steve Moraco/Mac (6)/Downloads/a
 echo ""
 echo "Step 0: Checking environment..."
 cd "$PROJECT_ROOT"
+trap record_release EXIT
 
 # Check for DEPLOY_SECRET
 if [ -z "${DEPLOY_SECRET:-}" ]; then
@@ -126,6 +151,7 @@ DMG_STATUS_FILE=$(mktemp)
 TESTFLIGHT_STATUS_FILE=$(mktemp)
 echo "pending" > "$DMG_STATUS_FILE"
 echo "pending" > "$TESTFLIGHT_STATUS_FILE"
+TESTFLIGHT_TIMINGS_FILE=$(mktemp)
 
 # ============================================
 # TASK A: DMG Creation (runs in background)
@@ -333,12 +359,18 @@ DMG_PID=$!
 (
     echo "[TestFlight] Starting TestFlight polling..."
 
-    # Run the TestFlight setup script
-    python3 "$PROJECT_ROOT/scripts/testflight_setup.py" --build "$BUILD_NUMBER"
+    # Run the TestFlight setup script (|| keeps set -e from killing the
+    # subshell before the exit status is classified)
+    TESTFLIGHT_EXIT=0
+    python3 "$PROJECT_ROOT/scripts/testflight_setup.py" --build "$BUILD_NUMBER" \
+        --timings-json "$TESTFLIGHT_TIMINGS_FILE" || TESTFLIGHT_EXIT=$?
 
-    if [ $? -eq 0 ]; then
+    if [ $TESTFLIGHT_EXIT -eq 0 ]; then
         echo "[TestFlight] ✓ TestFlight setup complete"
         echo "success" > "$TESTFLIGHT_STATUS_FILE"
+    elif [ $TESTFLIGHT_EXIT -eq 124 ]; then
+        echo "[TestFlight] ✗ TestFlight setup ran out of time (see step report above)"
+        echo "timeout" > "$TESTFLIGHT_STATUS_FILE"
     else
         echo "[TestFlight] ⚠ TestFlight setup had issues"
         echo "partial" > "$TESTFLIGHT_STATUS_FILE"
@@ -355,19 +387,21 @@ echo "  DMG task PID: $DMG_PID"
 echo "  TestFlight task PID: $TESTFLIGHT_PID"
 echo ""
 
-# Wait for DMG
-wait $DMG_PID
-DMG_EXIT=$?
+# Wait for DMG (a failed task must not abort the script before the summary)
+DMG_EXIT=0
+wait $DMG_PID || DMG_EXIT=$?
 DMG_RESULT=$(cat "$DMG_STATUS_FILE")
 echo "  ✓ DMG task finished: $DMG_RESULT"
 
 # Wait for TestFlight
-wait $TESTFLIGHT_PID
-TESTFLIGHT_EXIT=$?
+TESTFLIGHT_EXIT=0
+wait $TESTFLIGHT_PID || TESTFLIGHT_EXIT=$?
 TESTFLIGHT_RESULT=$(cat "$TESTFLIGHT_STATUS_FILE")
 echo "  ✓ TestFlight finished: $TESTFLIGHT_RESULT"
 
-# Cleanup temp files
+RELEASE_SECONDS=$(( $(date +%s) - RELEASE_START ))
+
+# Cleanup temp files (the timings file is recorded and removed on exit)
 rm -f "$DMG_STATUS_FILE" "$TESTFLIGHT_STATUS_FILE"
 
 echo ""
@@ -381,6 +415,7 @@ echo "  DMG: $DMG_NAME"
 echo ""
 echo "  DMG Status: $DMG_RESULT"
 echo "  TestFlight Status: $TESTFLIGHT_RESULT"
+echo "  Release Time: ${RELEASE_SECONDS}s"
 echo ""
 echo "  TestFlight: https://testflight.apple.com/join/PtzCFZKb"
 if [ "$DMG_RESULT" = "success" ]; then
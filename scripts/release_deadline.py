@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Release Deadline
+End-to-end time budget shared by the release scripts (testflight_setup.py,
+create_developer_id_cert.py). Every HTTP call, poll sleep and subprocess
+takes its timeout from what is left of the budget, so one stalled TLS read
+or hung command can't hold a release forever.
+
+requests applies an HTTP call's timeout to the connect and to each socket
+read, not to the whole response: a server that keeps trickling bytes can run
+a single call past the budget. The overrun is bounded by the next check(),
+which every following call, sleep and step makes before doing any work.
+
+Work is split into named steps; when the budget runs out the current call
+raises DeadlineExceeded and report() shows how long each step took and
+which one was running at expiry. A command that outlives its own cap
+while budget remains raises CommandTimedOut, reported the same way.
+save() writes the same timings as JSON for the results database
+(python3 -m chat_harness.results record --timings).
+"""
+import json
+import subprocess
+import time
+from contextlib import contextmanager
+
+# Exit status when the budget runs out (same as coreutils `timeout`)
+EXIT_DEADLINE = 124
+
+class DeadlineExceeded(Exception):
+    """Raised when the run's time budget is used up"""
+
+class CommandTimedOut(Exception):
+    """Raised when a command hits its per-call cap before the budget runs out"""
+
+class Deadline:
+    """A wall-clock budget for the whole run, split into named steps"""
+
+    def __init__(self, seconds=None):
+        self.budget = seconds
+        self.start = time.monotonic()
+        self.steps = []       # [name, depth, seconds or None while running]
+        self.depth = 0
+        self.current = None
+        self.expired_in = None  # innermost step entry running when the budget ran out
+        self.timed_out_in = None  # innermost step entry whose command hit its cap
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def remaining(self):
+        """Seconds left (inf when unbounded)"""
+        if self.budget is None:
+            return float('inf')
+        return self.budget - self.elapsed()
+
+    def check(self):
+        """Raise DeadlineExceeded if the budget is used up"""
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(f"deadline of {self.budget:.0f}s exceeded during '{self.current}'")
+
+    def timeout(self, cap=None):
+        """Timeout for one call: the remaining budget, capped at `cap` seconds"""
+        self.check()
+        remaining = self.remaining()
+        if cap is not None:
+            remaining = min(remaining, cap)
+        return max(remaining, 0.001)
+
+    def sleep(self, seconds):
+        """Sleep, but never past the deadline"""
+        time.sleep(min(seconds, max(self.remaining(), 0)))
+        self.check()
+
+    def run(self, cmd, cap=None, **kwargs):
+        """subprocess.run() bounded by the remaining budget"""
+        try:
+            return subprocess.run(cmd, timeout=self.timeout(cap), **kwargs)
+        except subprocess.TimeoutExpired as e:
+            self.check()
+            raise CommandTimedOut(f"'{e.cmd[0]}' timed out after {e.timeout:.0f}s during '{self.current}'")
+
+    @contextmanager
+    def step(self, name):
+        """Time a named step; nested steps are indented in the report"""
+        entry = [name, self.depth, None]
+        self.steps.append(entry)
+        outer = self.current
+        self.current = name
+        self.depth += 1
+        began = time.monotonic()
+        try:
+            yield
+        except DeadlineExceeded:
+            if self.expired_in is None:
+                self.expired_in = entry
+            raise
+        except CommandTimedOut:
+            if self.timed_out_in is None:
+                self.timed_out_in = entry
+            raise
+        finally:
+            entry[2] = time.monotonic() - began
+            self.depth -= 1
+            self.current = outer
+
+    def report(self):
+        """Print the time spent per step"""
+        budget = "unbounded" if self.budget is None else f"{self.budget:.0f}s"
+        print(f"\n  Time budget: {budget}, used {self.elapsed():.0f}s")
+        for entry in self.steps:
+            name, depth, seconds = entry
+            marker = ("  <- deadline hit here" if entry is self.expired_in else
+                      "  <- command timed out here" if entry is self.timed_out_in else "")
+            share = f" ({seconds / self.budget:.0%})" if self.budget else ""
+            print(f"    {'  ' * depth}{name:<{40 - 2 * depth}} {seconds:7.1f}s{share}{marker}")
+
+    def save(self, path):
+        """Write step timings as JSON"""
+        with open(path, 'w') as f:
+            json.dump({
+                'budget': self.budget,
+                'elapsed': self.elapsed(),
+                'expired_in': self.expired_in[0] if self.expired_in else None,
+                'timed_out_in': self.timed_out_in[0] if self.timed_out_in else None,
+                'steps': [{'name': name, 'depth': depth, 'seconds': seconds}
+                          for name, depth, seconds in self.steps],
+            }, f, indent=2)
@@ -3,10 +3,11 @@
 TestFlight Setup Script
 Handles API calls to configure TestFlight for new builds:
 1. Poll until builds are processed (VALID state)
-2. Submit export compliance
-3. Add builds to the "Public Testers" beta group
-4. Submit builds for beta review
-5. Do NOT exit until both iOS and macOS are submitted for public testing
+2. Sync "What to Test" notes per locale (only changed locales are written)
+3. Submit export compliance
+4. Add builds to the "Public Testers" beta group
+5. Submit builds for beta review
+6. Do NOT exit until both iOS and macOS are submitted for public testing
 """
 import jwt
 import time
@@ -14,8 +15,13 @@ import requests
 import json
 import sys
 import argparse
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from release_deadline import EXIT_DEADLINE, Deadline, DeadlineExceeded
+
 # Credentials
 KEY_ID = "S9KW8G5RHS"
 ISSUER_ID = "c63dccab-1ecd-41dc-9374-174cfdb70958"
@@ -26,6 +32,14 @@ APP_ID = "6755838738"
 MAX_WAIT_MINUTES = 30
 POLL_INTERVAL_SECONDS = 30
 
+# Time budget for the whole run; every HTTP call, poll sleep and subprocess
+# gets what is left of it (capped per call so one stalled read fails fast)
+DEADLINE_MINUTES = 45
+HTTP_TIMEOUT_SECONDS = 30
+PROCESS_RESERVE_SECONDS = 120  # stop polling early to leave this for processing
+
+deadline = Deadline()
+
 def get_token():
     """Generate JWT token for App Store Connect API"""
     try:
@@ -49,7 +63,12 @@ def api_get(path):
     """Make GET request to App Store Connect API"""
     token = get_token()
     headers = {'Authorization': f'Bearer {token}'}
-    response = requests.get(f'https://api.appstoreconnect.apple.com{path}', headers=headers)
+    try:
+        response = requests.get(f'https://api.appstoreconnect.apple.com{path}', headers=headers,
+                                timeout=deadline.timeout(HTTP_TIMEOUT_SECONDS))
+    except requests.RequestException:
+        deadline.check()
+        return None
 
     if response.status_code != 200:
         return None
@@ -60,7 +79,12 @@ def api_post(path, data):
     """Make POST request to App Store Connect API"""
     token = get_token()
     headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
-    response = requests.post(f'https://api.appstoreconnect.apple.com{path}', headers=headers, json=data)
+    try:
+        response = requests.post(f'https://api.appstoreconnect.apple.com{path}', headers=headers, json=data,
+                                 timeout=deadline.timeout(HTTP_TIMEOUT_SECONDS))
+    except requests.RequestException as e:
+        deadline.check()
+        return None, str(e)
 
     if response.status_code not in [200, 201, 204]:
         return None, response.text
@@ -71,7 +95,12 @@ def api_patch(path, data):
     """Make PATCH request to App Store Connect API"""
     token = get_token()
     headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
-    response = requests.patch(f'https://api.appstoreconnect.apple.com{path}', headers=headers, json=data)
+    try:
+        response = requests.patch(f'https://api.appstoreconnect.apple.com{path}', headers=headers, json=data,
+                                  timeout=deadline.timeout(HTTP_TIMEOUT_SECONDS))
+    except requests.RequestException as e:
+        deadline.check()
+        return None, str(e)
 
     if response.status_code not in [200, 204]:
         return None, response.text
@@ -153,49 +182,163 @@ WHAT_TO_TEST = """Key features to test in this build:
 
 Please send feedback to steve@lander.media"""
 
-def set_what_to_test(build_id):
-    """Set the 'What to Test' notes for a build"""
-    # Get existing localization
-    response = api_get(f'/v1/builds/{build_id}/betaBuildLocalizations')
-    if not response or 'data' not in response:
-        return False
+# Locales that get "What to Test" notes when no --notes file says otherwise
+WHAT_TO_TEST_LOCALES = ['en-US']
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-    locs = response.get('data', [])
-    if locs:
-        # Update existing
-        loc_id = locs[0]['id']
+def read_marketing_version():
+    """Marketing version from version.json (e.g. 1.0.1), or None"""
+    try:
+        with open(os.path.join(PROJECT_ROOT, 'version.json'), 'r') as f:
+            return json.load(f).get('version')
+    except (OSError, ValueError):
+        return None
+
+def changelog_section(path, version):
+    """Body of the '## <version>' (or '## [<version>]') section of a markdown changelog"""
+    with open(path, 'r') as f:
+        lines = f.read().splitlines()
+
+    heading = re.compile(r'^##\s+\[?v?' + re.escape(version or '') + r'\]?(\s|$)')
+    section = None
+    for line in lines:
+        if section is None:
+            if version and heading.match(line):
+                section = []
+        elif line.startswith('## '):
+            break
+        else:
+            section.append(line)
+    return '\n'.join(section).strip() if section else ''
+
+def load_what_to_test(notes_path=None, locales=None):
+    """Map of locale -> notes template
+
+    notes_path may be:
+    - None: the built-in WHAT_TO_TEST for every locale
+    - a .json file: {"en-US": "...", "de-DE": "..."}
+    - a directory of <locale>.txt files
+    - any other file: one template used for every locale
+    locales restricts (or, for a single template, sets) the locales synced.
+    """
+    if notes_path is None:
+        templates = {loc: WHAT_TO_TEST for loc in (locales or WHAT_TO_TEST_LOCALES)}
+    elif os.path.isdir(notes_path):
+        templates = {}
+        for name in sorted(os.listdir(notes_path)):
+            if name.endswith('.txt'):
+                with open(os.path.join(notes_path, name), 'r') as f:
+                    templates[name[:-4]] = f.read()
+    elif notes_path.endswith('.json'):
+        with open(notes_path, 'r') as f:
+            templates = json.load(f)
+    else:
+        with open(notes_path, 'r') as f:
+            text = f.read()
+        templates = {loc: text for loc in (locales or WHAT_TO_TEST_LOCALES)}
+
+    if locales:
+        missing = [loc for loc in locales if loc not in templates]
+        if missing:
+            print(f"ERROR: No What to Test notes for locale(s): {', '.join(missing)}")
+            sys.exit(1)
+        templates = {loc: templates[loc] for loc in locales}
+    return templates
+
+def render_what_to_test(template, build, changes=''):
+    """Fill {version}, {build}, {platform} and {changes} in a notes template"""
+    platform = detect_platform(build)
+    values = {
+        'version': read_marketing_version() or '',
+        'build': build['attributes'].get('version', ''),
+        'platform': {'IOS': 'iOS', 'MAC_OS': 'macOS'}.get(platform, platform),
+        'changes': changes,
+    }
+    text = template
+    for key, value in values.items():
+        text = text.replace('{' + key + '}', value)
+    return normalize_notes(text)
+
+def normalize_notes(text):
+    """Canonical form used both for sending and for comparing with what's stored"""
+    return '\n'.join(line.rstrip() for line in (text or '').replace('\r\n', '\n').split('\n')).strip()
+
+def write_localization(build_id, locale, text, loc_id=None):
+    """PATCH an existing localization or POST a new one; returns (locale, action, error)"""
+    if loc_id:
         result, error = api_patch(f'/v1/betaBuildLocalizations/{loc_id}', {
             'data': {
                 'type': 'betaBuildLocalizations',
                 'id': loc_id,
                 'attributes': {
-                    'whatsNew': WHAT_TO_TEST
+                    'whatsNew': text
                 }
             }
         })
-        return result is not None
-    else:
-        # Create new
-        result, error = api_post('/v1/betaBuildLocalizations', {
-            'data': {
-                'type': 'betaBuildLocalizations',
-                'attributes': {
-                    'locale': 'en-US',
-                    'whatsNew': WHAT_TO_TEST
-                },
-                'relationships': {
-                    'build': {
-                        'data': {
-                            'type': 'builds',
-                            'id': build_id
-                        }
+        return locale, 'updated', error if result is None else None
+
+    result, error = api_post('/v1/betaBuildLocalizations', {
+        'data': {
+            'type': 'betaBuildLocalizations',
+            'attributes': {
+                'locale': locale,
+                'whatsNew': text
+            },
+            'relationships': {
+                'build': {
+                    'data': {
+                        'type': 'builds',
+                        'id': build_id
                     }
                 }
             }
-        })
-        return result is not None
+        }
+    })
+    return locale, 'created', error if result is None else None
 
-def process_build(build, public_group_id):
+def sync_what_to_test(build, notes):
+    """Bring a build's 'What to Test' notes in line with the rendered notes
+
+    notes maps locale -> rendered text. Only locales whose stored text differs
+    are written (PATCH, or POST when the locale doesn't exist yet), and those
+    writes run concurrently. Locales not in notes are left alone.
+    Returns {'unchanged': [...], 'updated': [...], 'created': [...], 'failed': {...}}
+    or None if the current localizations could not be read.
+    """
+    build_id = build['id']
+    response = api_get(f'/v1/builds/{build_id}/betaBuildLocalizations?limit=200')
+    if not response or 'data' not in response:
+        return None
+
+    stored = {}
+    for loc in response.get('data', []):
+        attrs = loc.get('attributes', {})
+        stored[attrs.get('locale')] = (loc['id'], attrs.get('whatsNew'))
+
+    summary = {'unchanged': [], 'updated': [], 'created': [], 'failed': {}}
+    writes = []
+    for locale, text in notes.items():
+        loc_id, current = stored.get(locale, (None, None))
+        if loc_id and normalize_notes(current) == text:
+            summary['unchanged'].append(locale)
+        else:
+            writes.append((locale, text, loc_id))
+
+    if writes:
+        with ThreadPoolExecutor(max_workers=min(len(writes), 8)) as pool:
+            futures = [pool.submit(write_localization, build_id, locale, text, loc_id)
+                       for locale, text, loc_id in writes]
+            for future in futures:
+                locale, action, error = future.result()
+                if error is None:
+                    summary[action].append(locale)
+                else:
+                    summary['failed'][locale] = error
+
+    return summary
+
+def process_build(build, public_group_id, what_to_test=None, changes=''):
     """Process a single build: set compliance, add to group, submit for review"""
     build_id = build['id']
     version = build['attributes'].get('version', 'unknown')
@@ -204,25 +347,34 @@ def process_build(build, public_group_id):
 
     print(f"\n  Processing {platform} build {version}...")
 
-    # Step 0: Set "What to Test" notes
-    print("    0) Setting 'What to Test' notes...")
-    if set_what_to_test(build_id):
-        print("       ✓ What to Test notes set")
+    # Step 0: Sync "What to Test" notes (writes only locales that changed)
+    print("    0) Syncing 'What to Test' notes...")
+    templates = what_to_test or load_what_to_test()
+    notes = {loc: render_what_to_test(t, build, changes) for loc, t in templates.items()}
+    with deadline.step(f"{platform} What to Test notes"):
+        summary = sync_what_to_test(build, notes)
+    if summary is None:
+        print("       ⚠ Could not read What to Test notes")
     else:
-        print("       ⚠ Could not set What to Test notes")
+        for action in ('unchanged', 'updated', 'created'):
+            if summary[action]:
+                print(f"       ✓ {action.capitalize()}: {', '.join(sorted(summary[action]))}")
+        for locale, error in sorted(summary['failed'].items()):
+            print(f"       ⚠ Could not write {locale}: {error[:100] if error else 'unknown'}")
 
     # Step 1: Set export compliance
     print("    a) Setting export compliance...")
     if uses_encryption is None:
-        response, error = api_patch(f'/v1/builds/{build_id}', {
-            'data': {
-                'type': 'builds',
-                'id': build_id,
-                'attributes': {
-                    'usesNonExemptEncryption': False
+        with deadline.step(f"{platform} export compliance"):
+            response, error = api_patch(f'/v1/builds/{build_id}', {
+                'data': {
+                    'type': 'builds',
+                    'id': build_id,
+                    'attributes': {
+                        'usesNonExemptEncryption': False
+                    }
                 }
-            }
-        })
+            })
         if response:
             print("       ✓ Export compliance set (usesNonExemptEncryption=False)")
         else:
@@ -232,9 +384,10 @@ def process_build(build, public_group_id):
 
     # Step 2: Add to public beta group
     print("    b) Adding to public beta group...")
-    response, error = api_post(f'/v1/betaGroups/{public_group_id}/relationships/builds', {
-        'data': [{'type': 'builds', 'id': build_id}]
-    })
+    with deadline.step(f"{platform} add to beta group"):
+        response, error = api_post(f'/v1/betaGroups/{public_group_id}/relationships/builds', {
+            'data': [{'type': 'builds', 'id': build_id}]
+        })
     if response:
         print("       ✓ Added to public beta group")
     else:
@@ -245,14 +398,15 @@ def process_build(build, public_group_id):
 
     # Step 3: Submit for beta review
     print("    c) Submitting for beta review...")
-    response, error = api_post('/v1/betaAppReviewSubmissions', {
-        'data': {
-            'type': 'betaAppReviewSubmissions',
-            'relationships': {
-                'build': {'data': {'type': 'builds', 'id': build_id}}
+    with deadline.step(f"{platform} beta review submission"):
+        response, error = api_post('/v1/betaAppReviewSubmissions', {
+            'data': {
+                'type': 'betaAppReviewSubmissions',
+                'relationships': {
+                    'build': {'data': {'type': 'builds', 'id': build_id}}
+                }
             }
-        }
-    })
+        })
 
     if response:
         print("       ✓ Submitted for beta review")
@@ -277,8 +431,41 @@ def process_build(build, public_group_id):
 def main():
     parser = argparse.ArgumentParser(description='Configure TestFlight for new builds')
     parser.add_argument('--build', type=str, help='Build number to wait for and process')
+    parser.add_argument('--notes', help='What to Test template: a text file, a {locale: text} .json '
+                                        'file, or a directory of <locale>.txt files')
+    parser.add_argument('--changelog', help='Markdown changelog; the section for this version fills {changes}')
+    parser.add_argument('--locales', help='Comma-separated locales to sync (default: all in --notes, or en-US)')
+    parser.add_argument('--deadline-minutes', type=float, default=DEADLINE_MINUTES,
+                        help='Time budget for the whole run; every API call and wait is bounded by what is left')
+    parser.add_argument('--timings-json', help='Write per-step timings to this JSON file')
     args = parser.parse_args()
 
+    global deadline
+    deadline = Deadline(args.deadline_minutes * 60)
+    try:
+        setup_testflight(args)
+    except DeadlineExceeded as e:
+        print("\n" + "=" * 60)
+        print("✗ TESTFLIGHT SETUP ABORTED - TIME BUDGET EXCEEDED")
+        print("=" * 60)
+        print(f"  {e}")
+        deadline.report()
+        sys.exit(EXIT_DEADLINE)
+    finally:
+        if args.timings_json:
+            deadline.save(args.timings_json)
+    deadline.report()
+
+def setup_testflight(args):
+    """Everything after argument parsing; runs inside the deadline"""
+    locales = [loc.strip() for loc in args.locales.split(',')] if args.locales else None
+    what_to_test = load_what_to_test(args.notes, locales)
+    changes = ''
+    if args.changelog:
+        changes = changelog_section(args.changelog, read_marketing_version())
+        if not changes:
+            print(f"WARNING: No changelog section for {read_marketing_version()} in {args.changelog}")
+
     print("=" * 60)
     print("TESTFLIGHT SETUP - AUTOMATED")
     print("=" * 60)
@@ -287,12 +474,12 @@ def main():
     target_build = args.build
     if not target_build:
         # Try to get from environment or use latest
-        import os
         target_build = os.environ.get('BUILD_NUMBER')
 
     # Get public beta group
     print("\n1. Getting public beta group...")
-    public_group_id, group_name = get_public_beta_group()
+    with deadline.step("get public beta group"):
+        public_group_id, group_name = get_public_beta_group()
     if not public_group_id:
         print("ERROR: No public beta group found!")
         sys.exit(1)
@@ -310,41 +497,45 @@ def main():
         ios_build = None
         macos_build = None
 
-        while time.time() - start_time < max_wait_seconds:
-            builds = get_builds_by_version(target_build)
-
-            for build in builds:
-                platform = detect_platform(build)
-                state = build['attributes'].get('processingState', 'unknown')
-
-                if platform == 'IOS' and state == 'VALID':
-                    ios_ready = True
-                    ios_build = build
-                elif platform == 'MAC_OS' and state == 'VALID':
-                    macos_ready = True
-                    macos_build = build
-
-            elapsed = int(time.time() - start_time)
-
-            if ios_ready and macos_ready:
-                print(f"\n   ✓ Both builds ready after {elapsed}s!")
-                break
-
-            status = []
-            if ios_ready:
-                status.append("iOS: READY")
-            else:
-                status.append("iOS: waiting...")
-            if macos_ready:
-                status.append("macOS: READY")
-            else:
-                status.append("macOS: waiting...")
-
-            print(f"   [{elapsed}s] {' | '.join(status)}")
-            time.sleep(POLL_INTERVAL_SECONDS)
+        with deadline.step("wait for build processing"):
+            while time.time() - start_time < max_wait_seconds:
+                builds = get_builds_by_version(target_build)
+
+                for build in builds:
+                    platform = detect_platform(build)
+                    state = build['attributes'].get('processingState', 'unknown')
+
+                    if platform == 'IOS' and state == 'VALID':
+                        ios_ready = True
+                        ios_build = build
+                    elif platform == 'MAC_OS' and state == 'VALID':
+                        macos_ready = True
+                        macos_build = build
+
+                elapsed = int(time.time() - start_time)
+
+                if ios_ready and macos_ready:
+                    print(f"\n   ✓ Both builds ready after {elapsed}s!")
+                    break
+
+                status = []
+                if ios_ready:
+                    status.append("iOS: READY")
+                else:
+                    status.append("iOS: waiting...")
+                if macos_ready:
+                    status.append("macOS: READY")
+                else:
+                    status.append("macOS: waiting...")
+
+                print(f"   [{elapsed}s] {' | '.join(status)}")
+                if deadline.remaining() < POLL_INTERVAL_SECONDS + PROCESS_RESERVE_SECONDS:
+                    print(f"   ⚠ Time budget nearly used - processing what's ready")
+                    break
+                deadline.sleep(POLL_INTERVAL_SECONDS)
 
         if not (ios_ready and macos_ready):
-            print(f"\n   ⚠ Timeout after {MAX_WAIT_MINUTES} minutes")
+            print(f"\n   ⚠ Stopped waiting after {int(time.time() - start_time)}s")
             if not ios_ready:
                 print("     iOS build not ready")
             if not macos_ready:
@@ -357,13 +548,15 @@ def main():
         success_count = 0
         waiting_count = 0
         if ios_build:
-            result = process_build(ios_build, public_group_id)
+            with deadline.step("process iOS build"):
+                result = process_build(ios_build, public_group_id, what_to_test, changes)
             if result == True:
                 success_count += 1
             elif result == "waiting":
                 waiting_count += 1
         if macos_build:
-            result = process_build(macos_build, public_group_id)
+            with deadline.step("process macOS build"):
+                result = process_build(macos_build, public_group_id, what_to_test, changes)
             if result == True:
                 success_count += 1
             elif result == "waiting":
@@ -396,7 +589,8 @@ def main():
     else:
         # No specific build - process latest valid builds
         print("\n2. Getting latest builds...")
-        builds_response = api_get(f'/v1/apps/{APP_ID}/builds?limit=10')
+        with deadline.step("get latest builds"):
+            builds_response = api_get(f'/v1/apps/{APP_ID}/builds?limit=10')
 
         if not builds_response or 'data' not in builds_response:
             print("ERROR: Could not fetch builds")
@@ -426,13 +620,17 @@ def main():
         success_count = 0
 
         if ios_build:
-            if process_build(ios_build, public_group_id):
+            with deadline.step("process iOS build"):
+                processed = process_build(ios_build, public_group_id, what_to_test, changes)
+            if processed:
                 success_count += 1
         else:
             print("   No valid iOS build found")
 
         if macos_build:
-            if process_build(macos_build, public_group_id):
+            with deadline.step("process macOS build"):
+                processed = process_build(macos_build, public_group_id, what_to_test, changes)
+            if processed:
                 success_count += 1
         else:
             print("   No valid macOS build found")
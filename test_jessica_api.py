@@ -4,147 +4,92 @@ E2E Test for Jessica Persona - Price-Sensitive Newbie
 Tests the sales conversation flow with a price-conscious photographer
 """
 
-import requests
-import json
+import sqlite3
+import sys
 import time
-from typing import Dict, List, Any
+from typing import Dict, List, Optional, Tuple
 
-BASE_URL = "http://localhost:5000"
+from chat_harness.assertions import PASS, TurnExpectation, describe
+from chat_harness.client import (
+    BASE_URL, build_message_payload, build_welcome_payload, log,
+    post_welcome, stream_message
+)
+from chat_harness.personas import load_persona
+from chat_harness.results import DEFAULT_DB, latency_stats, record_run
+from chat_harness.session import FALLBACK_WELCOME
 
-# Jessica's persona data
-JESSICA_PROFILE = {
-    "shoots_per_week": 1,
-    "hours_per_shoot": 6,
-    "billable_rate": 50,  # $50/hour
-    "annual_shoots": 44,  # 1 * 44 weeks
-    "annual_waste_hours": 264,  # 44 * 6
-    "annual_waste_cost": 13200,  # 264 * 50
-    "price_threshold": 2500,  # Her max budget
-}
+# Jessica's persona data lives in chat_harness/personas/jessica.json
+JESSICA = load_persona("jessica")
+JESSICA_PROFILE = JESSICA["profile"]
 
 SESSION_ID = f"jessica-test-{int(time.time())}"
 
-def log(msg: str, level: str = "INFO"):
-    """Simple logging"""
-    timestamp = time.strftime("%H:%M:%S")
-    print(f"[{timestamp}] [{level}] {msg}")
+# Raw welcome/message results, recorded in the results database at the end
+WELCOMES: List[Dict] = []
+MESSAGES: List[Dict] = []
 
 def test_welcome() -> str:
     """Test the welcome endpoint"""
     log("Testing POST /api/chat/welcome")
 
-    payload = {
-        "context": {
-            "timeOnSite": 360000,
-            "currentPath": "/",
-            "device": "Desktop",
-            "browser": "Chrome"
-        },
-        "history": [],
-        "sessionId": SESSION_ID,
-        "calculatorData": {
-            "shootsPerWeek": JESSICA_PROFILE["shoots_per_week"],
-            "hoursPerShoot": JESSICA_PROFILE["hours_per_shoot"],
-            "billableRate": JESSICA_PROFILE["billable_rate"],
-            "annualCost": JESSICA_PROFILE["annual_waste_cost"]
-        },
-        "sectionHistory": [
-            {"section": "calculator", "timeSpent": 180000, "visited": True},
-            {"section": "features", "timeSpent": 45000, "visited": True},
-            {"section": "pricing", "timeSpent": 0, "visited": False}
-        ],
-        "currentTime": int(time.time() * 1000)
-    }
+    result = post_welcome(build_welcome_payload(JESSICA, SESSION_ID), BASE_URL)
+    WELCOMES.append(result)
+    log(f"Welcome response status: {result['status']}")
 
-    try:
-        response = requests.post(f"{BASE_URL}/api/chat/welcome", json=payload, timeout=10)
-        log(f"Welcome response status: {response.status_code}")
-
-        if response.status_code == 200:
-            data = response.json()
-            log(f"Welcome response: {json.dumps(data, indent=2)}")
+    if result["error"]:
+        log(f"Welcome failed: {result['error']}", "ERROR")
+        return None
 
-            if data.get("skipped"):
-                log(f"Welcome skipped: {data.get('reason')}", "WARN")
-                return None
+    if result["skipped"]:
+        log(f"Welcome skipped: {result['reason']}", "WARN")
+        return None
 
-            if data.get("message"):
-                return data["message"]
+    return result["message"]
 
-            return None
-        else:
-            log(f"Welcome failed: {response.text}", "ERROR")
-            return None
-    except Exception as e:
-        log(f"Welcome error: {str(e)}", "ERROR")
-        return None
+def test_message(message: str, history: List[Dict[str, str]],
+                 expectation: Optional[TurnExpectation] = None) -> Tuple[Optional[str], bool]:
+    """Test the message endpoint
 
-def test_message(message: str, history: List[Dict[str, str]]) -> str:
-    """Test the message endpoint"""
+    If an expectation is given it is checked while the reply streams and the
+    stream is cancelled as soon as the turn has definitively passed or failed.
+    Returns (reply text, ok); like run_session, a mid-stream error event
+    makes the turn a failure even though partial text arrived.
+    """
     log(f"Testing POST /api/chat/message")
     log(f"User message: {message[:100]}...")
 
-    payload = {
-        "message": message,
-        "history": history,
-        "sessionId": SESSION_ID,
-        "userActivity": [
-            {"type": "click", "element": "calculator"},
-            {"type": "scroll", "section": "calculator", "time": 180000}
-        ],
-        "calculatorData": {
-            "shootsPerWeek": JESSICA_PROFILE["shoots_per_week"],
-            "hoursPerShoot": JESSICA_PROFILE["hours_per_shoot"],
-            "billableRate": JESSICA_PROFILE["billable_rate"],
-            "annualCost": JESSICA_PROFILE["annual_waste_cost"]
-        },
-        "sectionHistory": [
-            {"section": "calculator", "timeSpent": 180000, "visited": True},
-            {"section": "features", "timeSpent": 45000, "visited": True}
-        ],
-        "currentTime": int(time.time() * 1000),
-        "timezone": "America/Los_Angeles",
-        "currentPath": "/"
-    }
-
+    result = stream_message(
+        build_message_payload(JESSICA, SESSION_ID, message, history), BASE_URL, echo=True,
+        stop_when=expectation.should_stop if expectation else None
+    )
+    MESSAGES.append(result)
+    log(f"Message response status: {result['status']}")
+
+    if result["status"] != 200:
+        log(f"Message failed: {result['error']}", "ERROR")
+        return None, False
+    if result["error"]:
+        log(f"Message error: {result['error']}", "ERROR")
+
+    log(f"Received {result['chunks']} chunks" + (" (cancelled early)" if result["cancelled"] else ""))
+    if expectation:
+        expectation.finish(result["text"], result["step"])
+    return result["text"], not result["error"]
+
+def record(elapsed: float):
+    """Store this run in the results database; never fails the test"""
     try:
-        response = requests.post(f"{BASE_URL}/api/chat/message", json=payload, timeout=15, stream=True)
-        log(f"Message response status: {response.status_code}")
-
-        if response.status_code == 200:
-            # Parse SSE stream
-            full_response = ""
-            chunks_received = 0
-
-            for line in response.iter_lines():
-                if line:
-                    line_str = line.decode('utf-8') if isinstance(line, bytes) else line
-
-                    if line_str.startswith('data: '):
-                        chunks_received += 1
-                        try:
-                            chunk = json.loads(line_str[6:])
-
-                            # Extract content from delta chunks
-                            if chunk.get('type') == 'content_delta' or (chunk.get('choices') and chunk['choices'][0].get('delta', {}).get('content')):
-                                content = chunk.get('content') or chunk['choices'][0]['delta'].get('content', '')
-                                if content:
-                                    full_response += content
-                                    print(content, end='', flush=True)
-                            elif chunk.get('type') == 'status':
-                                log(f"Status: {chunk.get('message')}")
-                        except json.JSONDecodeError:
-                            pass
-
-            print()  # Newline after streaming response
-            log(f"Received {chunks_received} chunks")
-            return full_response
-        else:
-            log(f"Message failed: {response.text}", "ERROR")
-            return None
-    except Exception as e:
-        log(f"Message error: {str(e)}", "ERROR")
-        return None
+        run_id = record_run("jessica", {
+            "ttft": latency_stats([m["ttft"] for m in MESSAGES if not m["error"] and m["status"] == 200]),
+            "welcome": latency_stats([w["latency"] for w in WELCOMES if not w["error"]]),
+        }, sessions=1, requests=len(WELCOMES) + len(MESSAGES),
+            errors=sum(1 for w in WELCOMES if w["error"])
+            + sum(1 for m in MESSAGES if m["error"] or m["status"] != 200),
+            elapsed=elapsed, target=BASE_URL)
+    except sqlite3.Error as e:
+        log(f"Could not record results in {DEFAULT_DB}: {e}", "WARN")
+        return
+    log(f"Recorded as jessica run #{run_id} in {DEFAULT_DB}")
 
 def main():
     """Run the full test"""
@@ -159,100 +104,81 @@ def main():
     log(f"Price threshold: ${JESSICA_PROFILE['price_threshold']}/year")
     log("")
 
+    started = time.time()
+
     # Track conversation
     conversation = []
     turns = 0
-    current_step = 0
+    checks = []
 
     # Test welcome
     log("TURN 0: Welcome Message")
     log("-" * 60)
     welcome_msg = test_welcome()
     if welcome_msg:
-        conversation.append({"role": "assistant", "content": welcome_msg})
         turns += 1
         log(f"Welcome received, conversation started")
     else:
         log("Welcome failed or skipped", "WARN")
-        welcome_msg = "Hi! I'm here to help you figure out if Kull is a good fit."
-        conversation.append({"role": "assistant", "content": welcome_msg})
+    conversation.append({"role": "assistant", "content": welcome_msg or FALLBACK_WELCOME})
 
     log("")
 
-    # Turn 1: Jessica asks about price (buying signal)
-    log("TURN 1: User Response - Price Inquiry")
-    log("-" * 60)
-    user_msg_1 = "wait, before we get started - is this going to be expensive? i'm just starting out and my budget is really tight. i'm looking for something under $2,500 a year"
-    log(f"User asks: {user_msg_1}")
-    log("")
+    # Scripted turns from the persona catalogue
+    for i, turn in enumerate(JESSICA["turns"], start=1):
+        log(f"TURN {i}: User Response - {turn['label']}")
+        log("-" * 60)
+        log(f"User says: {turn['message']}")
+        log("")
 
-    conversation.append({"role": "user", "content": user_msg_1})
-    response_1 = test_message(user_msg_1, conversation)
+        conversation.append({"role": "user", "content": turn["message"]})
+        expectation = TurnExpectation(turn.get("expect"), turn.get("expectStep"))
+        response, ok = test_message(turn["message"], conversation, expectation)
+        checks.append((turn, expectation, ok))
 
-    if response_1:
-        conversation.append({"role": "assistant", "content": response_1})
-        turns += 1
+        if response:
+            conversation.append({"role": "assistant", "content": response})
+            turns += 1
 
-    log("")
-    log("")
-
-    # Turn 2: Jessica confirms her numbers
-    log("TURN 2: User Response - Confirms Calculator")
-    log("-" * 60)
-    user_msg_2 = "yeah, 44 shoots a year sounds about right. I'm doing about 1 shoot a week, spending 6 hours culling each one. It's eating up so much time"
-    log(f"User says: {user_msg_2}")
-    log("")
-
-    conversation.append({"role": "user", "content": user_msg_2})
-    response_2 = test_message(user_msg_2, conversation)
-
-    if response_2:
-        conversation.append({"role": "assistant", "content": response_2})
-        turns += 1
-
-    log("")
-    log("")
-
-    # Turn 3: Ask about goals (Step 2)
-    log("TURN 3: User Response - Goals")
-    log("-" * 60)
-    user_msg_3 = "I want to take on more shoots, maybe double to 2 per week, but without working twice as many hours. I also want more time off"
-    log(f"User answers: {user_msg_3}")
-    log("")
-
-    conversation.append({"role": "user", "content": user_msg_3})
-    response_3 = test_message(user_msg_3, conversation)
-
-    if response_3:
-        conversation.append({"role": "assistant", "content": response_3})
-        turns += 1
-
-    log("")
-    log("")
+        log("")
+        log("")
 
     # Report
     log("="*60)
     log("TEST REPORT")
     log("="*60)
-    log(f"Persona: Jessica - Price-Sensitive Newbie")
+    log(f"Persona: {JESSICA['title']}")
     log(f"Profile:")
     log(f"  - Shoots: {JESSICA_PROFILE['annual_shoots']}/year (1/week)")
     log(f"  - Culling time: {JESSICA_PROFILE['annual_waste_hours']} hours/year")
     log(f"  - Current cost: ${JESSICA_PROFILE['annual_waste_cost']}/year")
     log(f"  - Budget threshold: ${JESSICA_PROFILE['price_threshold']}/year")
-    log(f"  - Skepticism: 5/10 (Medium)")
+    log(f"  - Skepticism: {JESSICA_PROFILE['skepticism']}/10")
     log("")
+    failed = [turn for turn, expectation, answered in checks if not answered or expectation.verdict != PASS]
     log(f"Test Results:")
     log(f"  - Turns completed: {turns}")
     log(f"  - Session ID: {SESSION_ID}")
-    log(f"  - Status: {'SUCCESS' if turns >= 2 else 'PARTIAL'}")
+    log(f"  - Status: {'FAILED' if failed else 'SUCCESS'} ({len(checks) - len(failed)}/{len(checks)} turns passed)")
     log("")
     log("Analysis:")
-    log("  - Jessica asked about pricing early (buying signal)")
-    log("  - Should skip 'want the price?' step 13 and go straight to step 14")
-    log("  - At $2,500 threshold, needs strong ROI case")
-    log("  - Annual waste ($13,200) >> plan cost ($5,988), strong value prop")
+    for turn, expectation, answered in checks:
+        rules = describe(turn.get("expect"))
+        if turn.get("expectStep") is not None:
+            rules.append(f"step {turn['expectStep']}")
+        if not answered:
+            status = "FAIL - request failed"
+        else:
+            status = "PASS" if expectation.verdict == PASS else f"FAIL - {expectation.reason}"
+        log(f"  - {turn['label']}: {status}")
+        for rule in rules:
+            log(f"      {rule}")
     log("")
 
+    record(time.time() - started)
+
+    if failed:
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,10 @@
+"""Make chat_harness and the standalone release scripts importable from tests"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+for path in (REPO_ROOT, os.path.join(REPO_ROOT, "scripts")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
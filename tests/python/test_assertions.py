@@ -0,0 +1,55 @@
+from chat_harness.assertions import FAIL, PASS, PENDING, TurnExpectation, describe
+
+
+def test_passes_early_once_every_match_has_streamed():
+    expectation = TurnExpectation({"match": ["5,988", "per (year|yr)"]})
+    assert expectation.feed("That's about $5,988") == PENDING
+    assert expectation.feed("That's about $5,988 per year") == PASS
+    assert expectation.should_stop("That's about $5,988 per year.")
+
+
+def test_match_split_across_chunks_is_found():
+    expectation = TurnExpectation({"match": ["annual cost"]})
+    assert expectation.feed("your annu") == PENDING
+    assert expectation.feed("your annual cost is") == PASS
+
+
+def test_forbidden_phrase_fails_immediately():
+    expectation = TurnExpectation({"forbid": ["want (to see )?the price"]})
+    assert expectation.feed("Great question! ") == PENDING
+    assert expectation.feed("Great question! Want the price?") == FAIL
+    assert "forbidden" in expectation.reason
+    # The verdict is final even if the text no longer contains the phrase
+    assert expectation.finish("", None) == FAIL
+
+
+def test_max_length_fails_as_soon_as_exceeded():
+    expectation = TurnExpectation({"maxLength": 10})
+    assert expectation.feed("short") == PENDING
+    assert expectation.feed("much too long now") == FAIL
+
+
+def test_pass_waits_for_end_when_later_text_could_still_fail():
+    expectation = TurnExpectation({"match": ["price"], "forbid": ["discount"]})
+    assert expectation.feed("the price is") == PENDING
+    assert expectation.finish("the price is fair", None) == PASS
+
+
+def test_missing_match_fails_at_finish():
+    expectation = TurnExpectation({"match": ["5,988"]})
+    assert expectation.finish("no numbers here", None) == FAIL
+    assert "never matched" in expectation.reason
+
+
+def test_expect_step_checked_at_finish():
+    assert TurnExpectation(expect_step=[1, 2]).finish("ok", 2) == PASS
+    expectation = TurnExpectation(expect_step=3)
+    assert expectation.finish("ok", 13) == FAIL
+    assert expectation.reason == "expected step 3, got 13"
+    assert TurnExpectation(expect_step=3).finish("ok", None) == FAIL
+
+
+def test_describe_lists_every_rule():
+    assert describe({"match": ["a"], "forbid": ["b"], "maxLength": 5}) == [
+        "mentions /a/", "never says /b/", "at most 5 chars"]
+    assert describe(None) == []
@@ -0,0 +1,58 @@
+from chat_harness.histogram import PRECISION_BITS, LatencyHistogram, bucket_of, bucket_top
+
+
+def test_small_values_are_exact():
+    for value in (0, 1, 100, (1 << PRECISION_BITS) - 1):
+        assert bucket_of(value) == value
+        assert bucket_top(value) == value
+
+
+def test_buckets_keep_about_one_percent_precision():
+    for value in (1_000, 123_456, 9_876_543, 60_000_000):
+        low, high = bucket_of(value), bucket_top(bucket_of(value))
+        assert low <= value <= high
+        assert (high - low) / value < 2 ** -(PRECISION_BITS - 1)
+
+
+def test_percentiles_within_precision():
+    hist = LatencyHistogram()
+    for ms in range(1, 1001):
+        hist.record(ms / 1000)
+    assert hist.total == 1000
+    assert abs(hist.value_at(50) - 0.5) / 0.5 < 0.01
+    assert abs(hist.value_at(99) - 0.99) / 0.99 < 0.01
+    assert hist.value_at(100) == 1.0
+
+
+def test_percentile_never_exceeds_max():
+    hist = LatencyHistogram()
+    hist.record(0.123457)
+    assert hist.value_at(99.9) == 0.123457
+
+
+def test_empty_histogram():
+    hist = LatencyHistogram()
+    assert hist.value_at(50) is None
+    assert hist.summary()["max"] is None
+
+
+def test_merge_matches_single_histogram():
+    combined, a, b = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i in range(1, 500):
+        seconds = i * 0.0037
+        combined.record(seconds)
+        (a if i % 2 else b).record(seconds)
+    a.merge(b)
+    assert a.counts == combined.counts
+    assert a.total == combined.total
+    assert a.summary() == combined.summary()
+
+
+def test_dict_round_trip_preserves_counts():
+    hist = LatencyHistogram()
+    for seconds in (0.05, 0.25, 0.25, 1.5, 30.0):
+        hist.record(seconds)
+    restored = LatencyHistogram.from_dict(hist.to_dict())
+    assert restored.counts == hist.counts
+    assert restored.total == hist.total
+    assert restored.value_at(50) == hist.value_at(50)
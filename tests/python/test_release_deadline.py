@@ -0,0 +1,117 @@
+import json
+import sys
+import time
+
+import pytest
+
+from release_deadline import CommandTimedOut, Deadline, DeadlineExceeded
+
+SLEEPER = [sys.executable, "-c", "import time; time.sleep(10)"]
+
+
+# ----------------------------------------------------------------------------
+# timeout / check
+# ----------------------------------------------------------------------------
+
+def test_timeout_is_capped_by_call_cap_and_budget():
+    deadline = Deadline(60)
+    assert deadline.timeout(5) == 5
+    assert 59 < deadline.timeout() <= 60
+    assert 59 < deadline.timeout(600) <= 60
+
+
+def test_unbounded_deadline_uses_the_cap():
+    deadline = Deadline()
+    assert deadline.timeout(5) == 5
+    assert deadline.timeout() == float('inf')
+
+
+def test_expired_budget_raises():
+    deadline = Deadline(0.01)
+    time.sleep(0.02)
+    with pytest.raises(DeadlineExceeded):
+        deadline.timeout(5)
+
+
+def test_sleep_stops_at_the_deadline():
+    deadline = Deadline(0.05)
+    began = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        deadline.sleep(5)
+    assert time.monotonic() - began < 1
+
+
+# ----------------------------------------------------------------------------
+# step
+# ----------------------------------------------------------------------------
+
+def test_nested_steps_record_depth_and_time():
+    deadline = Deadline(60)
+    with deadline.step("upload"):
+        with deadline.step("poll"):
+            assert deadline.current == "poll"
+        assert deadline.current == "upload"
+    assert deadline.current is None
+    assert [(name, depth) for name, depth, _ in deadline.steps] == [("upload", 0), ("poll", 1)]
+    assert all(seconds is not None for _, _, seconds in deadline.steps)
+
+
+def test_expiry_marks_the_innermost_step():
+    deadline = Deadline(0.01)
+    time.sleep(0.02)
+    with pytest.raises(DeadlineExceeded):
+        with deadline.step("upload"):
+            with deadline.step("poll"):
+                deadline.check()
+    assert deadline.expired_in[0] == "poll"
+    assert deadline.timed_out_in is None
+
+
+# ----------------------------------------------------------------------------
+# run
+# ----------------------------------------------------------------------------
+
+def test_run_returns_the_completed_process():
+    deadline = Deadline(60)
+    result = deadline.run([sys.executable, "-c", "print('ok')"], cap=30, capture_output=True, text=True)
+    assert result.stdout.strip() == "ok"
+
+
+def test_command_over_its_cap_raises_command_timed_out():
+    deadline = Deadline(60)
+    with pytest.raises(CommandTimedOut):
+        with deadline.step("notarize"):
+            deadline.run(SLEEPER, cap=0.2)
+    assert deadline.timed_out_in[0] == "notarize"
+    assert deadline.expired_in is None
+
+
+def test_command_outliving_the_budget_raises_deadline_exceeded():
+    deadline = Deadline(0.2)
+    with pytest.raises(DeadlineExceeded):
+        with deadline.step("notarize"):
+            deadline.run(SLEEPER, cap=30)
+    assert deadline.expired_in[0] == "notarize"
+
+
+# ----------------------------------------------------------------------------
+# save
+# ----------------------------------------------------------------------------
+
+def test_save_writes_steps_and_markers(tmp_path):
+    deadline = Deadline(60)
+    with deadline.step("build"):
+        pass
+    with pytest.raises(CommandTimedOut):
+        with deadline.step("notarize"):
+            deadline.run(SLEEPER, cap=0.2)
+    path = tmp_path / "timings.json"
+    deadline.save(str(path))
+
+    saved = json.loads(path.read_text())
+    assert saved["budget"] == 60
+    assert saved["elapsed"] > 0
+    assert saved["expired_in"] is None
+    assert saved["timed_out_in"] == "notarize"
+    assert [(s["name"], s["depth"]) for s in saved["steps"]] == [("build", 0), ("notarize", 0)]
+    assert all(s["seconds"] is not None for s in saved["steps"])
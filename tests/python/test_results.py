@@ -0,0 +1,145 @@
+import argparse
+import sqlite3
+
+import pytest
+
+from chat_harness.results import cmd_compare, compare_errors, compare_runs, connect, find_run, record_run
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "results.sqlite")
+
+
+def record(db, kind="suite", p95=1.0, requests=100, errors=0, label=None):
+    return record_run(kind, {"ttft": {"p95": p95}}, sessions=10, requests=requests, errors=errors,
+                      elapsed=10.0, label=label, db_path=db)
+
+
+def compare_args(**overrides):
+    args = {"kind": "suite", "baseline": "previous", "candidate": "latest",
+            "check": None, "threshold": 0.10, "error_tolerance": 0.0}
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+# ----------------------------------------------------------------------------
+# record_run / connect
+# ----------------------------------------------------------------------------
+
+def test_record_stores_sessions_requests_and_throughput(db):
+    run_id = record(db, requests=50)
+    row = connect(db).execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+    assert (row["sessions"], row["requests"], row["errors"]) == (10, 50, 0)
+    assert row["throughput"] == 5.0
+
+
+def test_connect_adds_sessions_to_an_old_database(db):
+    old = sqlite3.connect(db)
+    old.execute("CREATE TABLE runs (id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, "
+                "started_at TEXT NOT NULL, git_commit TEXT, git_dirty INTEGER, label TEXT, target TEXT, "
+                "elapsed REAL, requests INTEGER, errors INTEGER, throughput REAL, meta TEXT)")
+    old.close()
+    run_id = record(db)
+    assert connect(db).execute("SELECT sessions FROM runs WHERE id = ?", (run_id,)).fetchone()[0] == 10
+
+
+# ----------------------------------------------------------------------------
+# find_run
+# ----------------------------------------------------------------------------
+
+def test_find_latest_and_previous_of_a_kind(db):
+    first = record(db)
+    second = record(db)
+    record(db, kind="openloop")
+    conn = connect(db)
+    assert find_run(conn, "latest", "suite")["id"] == second
+    assert find_run(conn, "previous", "suite")["id"] == first
+
+
+def test_find_previous_needs_two_runs(db):
+    record(db)
+    assert find_run(connect(db), "previous", "suite") is None
+
+
+def test_find_by_id_and_label(db):
+    first = record(db, label="before-cache")
+    record(db)
+    conn = connect(db)
+    assert find_run(conn, str(first), "suite")["id"] == first
+    assert find_run(conn, "before-cache", "suite")["id"] == first
+    assert find_run(conn, "no-such-run", "suite") is None
+
+
+# ----------------------------------------------------------------------------
+# compare_runs / compare_errors
+# ----------------------------------------------------------------------------
+
+def test_compare_runs_flags_growth_past_threshold(db):
+    base, slow = record(db, p95=1.0), record(db, p95=1.2)
+    conn = connect(db)
+    baseline, candidate = find_run(conn, str(base), None), find_run(conn, str(slow), None)
+    [result] = compare_runs(conn, baseline, candidate, ["ttft.p95"], 0.10)
+    assert result["change"] == pytest.approx(0.2)
+    assert result["regressed"] and not result["missing"]
+    [result] = compare_runs(conn, baseline, candidate, ["ttft.p95"], 0.25)
+    assert not result["regressed"]
+
+
+def test_compare_runs_marks_missing_metrics(db):
+    base, cand = record(db), record(db)
+    conn = connect(db)
+    [result] = compare_runs(conn, find_run(conn, str(base), None), find_run(conn, str(cand), None),
+                            ["turn.p95"], 0.10)
+    assert result["missing"] and not result["regressed"]
+
+
+def test_compare_errors_uses_errors_per_request(db):
+    base, cand = record(db, errors=1), record(db, errors=3)
+    conn = connect(db)
+    baseline, candidate = find_run(conn, str(base), None), find_run(conn, str(cand), None)
+    result = compare_errors(baseline, candidate, 0.0)
+    assert result["change"] == pytest.approx(0.02)
+    assert result["regressed"]
+    assert not compare_errors(baseline, candidate, 0.05)["regressed"]
+
+
+# ----------------------------------------------------------------------------
+# cmd_compare exit codes
+# ----------------------------------------------------------------------------
+
+def test_cmd_compare_passes_within_threshold(db):
+    record(db, p95=1.0)
+    record(db, p95=1.05)
+    cmd_compare(connect(db), compare_args())
+
+
+def test_cmd_compare_exits_1_on_regression(db):
+    record(db, p95=1.0)
+    record(db, p95=1.5)
+    with pytest.raises(SystemExit) as exc:
+        cmd_compare(connect(db), compare_args())
+    assert exc.value.code == 1
+
+
+def test_cmd_compare_exits_1_on_new_errors(db):
+    record(db)
+    record(db, errors=5)
+    with pytest.raises(SystemExit) as exc:
+        cmd_compare(connect(db), compare_args())
+    assert exc.value.code == 1
+
+
+def test_cmd_compare_exits_1_when_candidate_lacks_metric(db):
+    record(db)
+    record_run("suite", {}, requests=100, errors=100, elapsed=10.0, db_path=db)
+    with pytest.raises(SystemExit) as exc:
+        cmd_compare(connect(db), compare_args(error_tolerance=1.0))
+    assert exc.value.code == 1
+
+
+def test_cmd_compare_exits_2_when_run_not_found(db):
+    record(db)
+    with pytest.raises(SystemExit) as exc:
+        cmd_compare(connect(db), compare_args())
+    assert exc.value.code == 2
@@ -0,0 +1,167 @@
+import json
+
+import pytest
+
+pytest.importorskip("jwt")
+pytest.importorskip("requests")
+
+import testflight_setup as tf  # noqa: E402
+
+
+BUILD = {"id": "build-1", "attributes": {"version": "42", "platform": "MAC_OS"}}
+
+
+# ----------------------------------------------------------------------------
+# normalize_notes
+# ----------------------------------------------------------------------------
+
+def test_normalize_notes_ignores_line_endings_and_trailing_space():
+    stored = "Test the culling flow.  \r\n\r\n- Ratings\t\r\n"
+    assert tf.normalize_notes(stored) == "Test the culling flow.\n\n- Ratings"
+    assert tf.normalize_notes(stored) == tf.normalize_notes("Test the culling flow.\n\n- Ratings")
+
+
+def test_normalize_notes_handles_missing_text():
+    assert tf.normalize_notes(None) == ""
+
+
+# ----------------------------------------------------------------------------
+# changelog_section
+# ----------------------------------------------------------------------------
+
+CHANGELOG = """# Changelog
+
+## [1.0.2] - 2025-12-01
+- Newer release
+
+## [1.0.1] - 2025-11-18
+- Faster culling
+- Fixed crash on import
+
+## v1.0.0
+- First release
+"""
+
+
+@pytest.fixture
+def changelog(tmp_path):
+    path = tmp_path / "CHANGELOG.md"
+    path.write_text(CHANGELOG)
+    return str(path)
+
+
+def test_changelog_section_matches_bracketed_heading(changelog):
+    assert tf.changelog_section(changelog, "1.0.1") == "- Faster culling\n- Fixed crash on import"
+
+
+def test_changelog_section_matches_v_prefixed_heading(changelog):
+    assert tf.changelog_section(changelog, "1.0.0") == "- First release"
+
+
+def test_changelog_section_requires_exact_version(changelog):
+    assert tf.changelog_section(changelog, "1.0") == ""
+    assert tf.changelog_section(changelog, "1.0.3") == ""
+    assert tf.changelog_section(changelog, None) == ""
+
+
+# ----------------------------------------------------------------------------
+# load_what_to_test / render_what_to_test
+# ----------------------------------------------------------------------------
+
+def test_load_defaults_to_builtin_notes():
+    assert tf.load_what_to_test() == {loc: tf.WHAT_TO_TEST for loc in tf.WHAT_TO_TEST_LOCALES}
+
+
+def test_load_directory_of_locale_files(tmp_path):
+    (tmp_path / "en-US.txt").write_text("english")
+    (tmp_path / "de-DE.txt").write_text("deutsch")
+    (tmp_path / "README.md").write_text("ignored")
+    assert tf.load_what_to_test(str(tmp_path)) == {"de-DE": "deutsch", "en-US": "english"}
+    assert tf.load_what_to_test(str(tmp_path), ["de-DE"]) == {"de-DE": "deutsch"}
+
+
+def test_load_json_and_single_template(tmp_path):
+    notes = tmp_path / "notes.json"
+    notes.write_text(json.dumps({"en-US": "english", "fr-FR": "français"}))
+    assert tf.load_what_to_test(str(notes))["fr-FR"] == "français"
+
+    template = tmp_path / "notes.txt"
+    template.write_text("same everywhere")
+    assert tf.load_what_to_test(str(template), ["en-US", "ja"]) == {
+        "en-US": "same everywhere", "ja": "same everywhere"}
+
+
+def test_load_exits_when_a_requested_locale_has_no_notes(tmp_path):
+    (tmp_path / "en-US.txt").write_text("english")
+    with pytest.raises(SystemExit):
+        tf.load_what_to_test(str(tmp_path), ["en-US", "de-DE"])
+
+
+def test_render_fills_placeholders(monkeypatch):
+    monkeypatch.setattr(tf, "read_marketing_version", lambda: "1.0.1")
+    text = tf.render_what_to_test("Kull {version} ({build}) on {platform}:  \n{changes}\n", BUILD, "- Faster")
+    assert text == "Kull 1.0.1 (42) on macOS:\n- Faster"
+
+
+# ----------------------------------------------------------------------------
+# sync_what_to_test
+# ----------------------------------------------------------------------------
+
+def localizations(*entries):
+    return {"data": [{"id": loc_id, "attributes": {"locale": locale, "whatsNew": text}}
+                     for loc_id, locale, text in entries]}
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Record write_localization calls instead of hitting the API"""
+    calls = []
+
+    def fake_write(build_id, locale, text, loc_id=None):
+        calls.append((build_id, locale, text, loc_id))
+        return locale, "updated" if loc_id else "created", None
+
+    monkeypatch.setattr(tf, "write_localization", fake_write)
+    return calls
+
+
+def test_sync_unchanged_locales_make_no_writes(monkeypatch, writes):
+    monkeypatch.setattr(tf, "api_get", lambda path: localizations(
+        ("loc-en", "en-US", "Test ratings.  \r\n"), ("loc-de", "de-DE", "Bewertungen testen.")))
+    summary = tf.sync_what_to_test(BUILD, {"en-US": "Test ratings.", "de-DE": "Bewertungen testen."})
+    assert writes == []
+    assert sorted(summary["unchanged"]) == ["de-DE", "en-US"]
+    assert summary["updated"] == summary["created"] == []
+
+
+def test_sync_patches_changed_and_posts_new_locales(monkeypatch, writes):
+    monkeypatch.setattr(tf, "api_get", lambda path: localizations(
+        ("loc-en", "en-US", "old notes"), ("loc-de", "de-DE", "Bewertungen testen.")))
+    summary = tf.sync_what_to_test(BUILD, {
+        "en-US": "new notes", "de-DE": "Bewertungen testen.", "fr-FR": "nouvelles notes"})
+    assert sorted(writes) == [
+        ("build-1", "en-US", "new notes", "loc-en"),
+        ("build-1", "fr-FR", "nouvelles notes", None),
+    ]
+    assert summary == {"unchanged": ["de-DE"], "updated": ["en-US"], "created": ["fr-FR"], "failed": {}}
+
+
+def test_sync_leaves_unlisted_locales_alone(monkeypatch, writes):
+    monkeypatch.setattr(tf, "api_get", lambda path: localizations(("loc-ja", "ja", "stale")))
+    tf.sync_what_to_test(BUILD, {"en-US": "notes"})
+    assert [w[1] for w in writes] == ["en-US"]
+
+
+def test_sync_reports_failed_writes(monkeypatch):
+    monkeypatch.setattr(tf, "api_get", lambda path: localizations(("loc-en", "en-US", "old")))
+    monkeypatch.setattr(tf, "write_localization",
+                        lambda build_id, locale, text, loc_id=None: (locale, "updated", "HTTP 409"))
+    summary = tf.sync_what_to_test(BUILD, {"en-US": "new"})
+    assert summary["failed"] == {"en-US": "HTTP 409"}
+    assert summary["updated"] == []
+
+
+def test_sync_returns_none_when_localizations_cannot_be_read(monkeypatch, writes):
+    monkeypatch.setattr(tf, "api_get", lambda path: None)
+    assert tf.sync_what_to_test(BUILD, {"en-US": "notes"}) is None
+    assert writes == []